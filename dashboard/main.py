@@ -1,13 +1,19 @@
 """Health Dashboard - FastAPI Backend"""
 
-from fastapi import FastAPI
+import asyncio
+import hashlib
+from fastapi import Depends, FastAPI, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import Response, StreamingResponse
 import duckdb
+import orjson
 import sys
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Iterable, List
 
 # Add parent src directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
@@ -20,6 +26,17 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 
 DB_PATH = str(get_db_path())
 
+# Seconds without requests before the shared connection is released
+DB_IDLE_TIMEOUT = 5.0
+
+# Seconds a computed /api/overview body is served before re-querying
+OVERVIEW_CACHE_TTL = 30.0
+
+# Page HTML, read once at startup rather than from disk on every request
+INDEX_HTML = Path("static/index.html").read_bytes()
+DETAIL_HTML = Path("static/detail.html").read_bytes()
+HTML_CACHE_CONTROL = "public, max-age=3600"
+
 # iOS Health Color Palette
 COLORS = {
     "activity": "#FF9500",  # Orange
@@ -27,155 +44,338 @@ COLORS = {
     "sleep": "#5E5CE6",     # Purple/indigo
 }
 
+# Period bucket columns for the detail charts, keyed by granularity.
+# Only these fixed names are ever spliced into SQL.
+# All dashboard queries read daily_metric_summary (see src/metric_summary.py),
+# one row per (date, metric) with its week/fortnight/month precomputed,
+# rather than scanning readings.
+PERIOD_EXPRESSIONS = {
+    "day": "date",
+    "week": "week",
+    "fortnight": "fortnight",
+    "month": "month",
+}
 
-def get_sparkline_data(metric: str, days: int = 7) -> List[Dict]:
-    """Get sparkline data (last 7 days)"""
-    try:
-        conn = duckdb.connect(DB_PATH, read_only=True)
-        
-        if metric == "Step Count":
-            result = conn.execute("""
-                SELECT DATE(timestamp) as date, SUM(value) as value
-                FROM readings 
-                WHERE metric = 'Step Count' 
-                AND timestamp > NOW() - INTERVAL '7 days'
-                GROUP BY DATE(timestamp)
-                ORDER BY date
-            """).fetchall()
-        elif metric == "Active Energy":
-            result = conn.execute("""
-                SELECT DATE(timestamp) as date, SUM(value) as value
-                FROM readings 
-                WHERE metric = 'Active Energy' 
-                AND timestamp > NOW() - INTERVAL '7 days'
-                GROUP BY DATE(timestamp)
-                ORDER BY date
-            """).fetchall()
-        else:  # HRV, Resting HR
-            result = conn.execute(f"""
-                SELECT DATE(timestamp) as date, AVG(value) as value
-                FROM readings 
-                WHERE metric = '{metric}' 
-                AND timestamp > NOW() - INTERVAL '7 days'
-                GROUP BY DATE(timestamp)
-                ORDER BY date
-            """).fetchall()
+# Map time ranges to SQL intervals and aggregation (matching Reflex logic)
+RANGE_CONFIG = {
+    "day": ("7 days", "day"),
+    "week": ("4 weeks", "day"),
+    "month": ("3 months", "day"),
+    "3month": ("6 months", "day"),
+    "6month": ("12 months", "week"),
+    "year": ("2 years", "week"),
+    "5year": ("5 years", "fortnight"),
+    "all": ("100 years", "month"),
+}
+
+# Detail SQL per metric. {group_by} is filled from PERIOD_EXPRESSIONS below;
+# the lookback interval stays a bound parameter. Each query returns the
+# (at most 150) chart periods plus the summary stats over those periods as
+# window aggregates, repeated on every row, so no reduction happens in Python.
+# Integer truncation and rounding are done here too, so values come back
+# ready to serialize.
+DETAIL_SQL = {
+    "steps": """
+        WITH periods AS (
+            SELECT CAST({group_by} AS VARCHAR) as period, SUM(sum_value) as total_steps
+            FROM daily_metric_summary 
+            WHERE metric = 'Step Count' 
+            AND date > CURRENT_DATE - CAST(? AS INTERVAL)
+            GROUP BY {group_by}
+            ORDER BY period DESC
+            LIMIT 150
+        )
+        SELECT
+            period,
+            TRUNC(total_steps)::BIGINT as total_steps,
+            TRUNC(SUM(total_steps) OVER ())::BIGINT as stat_total,
+            TRUNC(AVG(total_steps) OVER ())::BIGINT as stat_avg,
+            TRUNC(MAX(total_steps) OVER ())::BIGINT as stat_max,
+            TRUNC(MIN(total_steps) OVER ())::BIGINT as stat_min
+        FROM periods
+        ORDER BY period DESC
+    """,
+    "energy": """
+        WITH periods AS (
+            SELECT CAST({group_by} AS VARCHAR) as period, SUM(sum_value) as total_calories
+            FROM daily_metric_summary 
+            WHERE metric = 'Active Energy' 
+            AND date > CURRENT_DATE - CAST(? AS INTERVAL)
+            GROUP BY {group_by}
+            ORDER BY period DESC
+            LIMIT 150
+        )
+        SELECT
+            period,
+            TRUNC(total_calories)::BIGINT as total_calories,
+            TRUNC(SUM(total_calories) OVER ())::BIGINT as stat_total,
+            TRUNC(AVG(total_calories) OVER ())::BIGINT as stat_avg,
+            TRUNC(MAX(total_calories) OVER ())::BIGINT as stat_max
+        FROM periods
+        ORDER BY period DESC
+    """,
+    "heart": """
+        WITH periods AS (
+            SELECT
+                CAST({group_by} AS VARCHAR) as period,
+                SUM(sum_value) / SUM(reading_count) as avg_hr,
+                MIN(min_value) as min_hr,
+                MAX(max_value) as max_hr
+            FROM daily_metric_summary 
+            WHERE metric = 'Resting Heart Rate' 
+            AND date > CURRENT_DATE - CAST(? AS INTERVAL)
+            GROUP BY {group_by}
+            ORDER BY period DESC
+            LIMIT 150
+        )
+        SELECT
+            period,
+            ROUND(avg_hr, 1) as avg_hr,
+            ROUND(AVG(avg_hr) OVER (), 1) as stat_avg,
+            ROUND(MIN(min_hr) OVER (), 1) as stat_min,
+            ROUND(MAX(max_hr) OVER (), 1) as stat_max
+        FROM periods
+        ORDER BY period DESC
+    """,
+    "hrv": """
+        WITH periods AS (
+            SELECT CAST({group_by} AS VARCHAR) as period, SUM(sum_value) / SUM(reading_count) as avg_hrv
+            FROM daily_metric_summary 
+            WHERE metric = 'Heart Rate Variability' 
+            AND date > CURRENT_DATE - CAST(? AS INTERVAL)
+            GROUP BY {group_by}
+            ORDER BY period DESC
+            LIMIT 150
+        )
+        SELECT
+            period,
+            ROUND(avg_hrv, 1) as avg_hrv,
+            ROUND(AVG(avg_hrv) OVER (), 1) as stat_avg,
+            ROUND(MIN(avg_hrv) OVER (), 1) as stat_min,
+            ROUND(MAX(avg_hrv) OVER (), 1) as stat_max
+        FROM periods
+        ORDER BY period DESC
+    """,
+    "sleep": """
+        WITH periods AS (
+            SELECT 
+                CAST({group_by} AS VARCHAR) as period,
+                MAX(CASE WHEN metric = 'Sleep Analysis [REM]' THEN max_value ELSE 0 END) as rem,
+                MAX(CASE WHEN metric = 'Sleep Analysis [Deep]' THEN max_value ELSE 0 END) as deep,
+                MAX(CASE WHEN metric = 'Sleep Analysis [Core]' THEN max_value ELSE 0 END) as core
+            FROM daily_metric_summary 
+            WHERE metric LIKE 'Sleep Analysis%'
+            AND date > CURRENT_DATE - CAST(? AS INTERVAL)
+            GROUP BY {group_by}
+            ORDER BY period DESC
+            LIMIT 150
+        )
+        SELECT
+            period,
+            ROUND(rem, 2) as rem,
+            ROUND(deep, 2) as deep,
+            ROUND(core, 2) as core,
+            ROUND(rem + deep + core, 2) as total,
+            ROUND(AVG(rem + deep + core) OVER (), 2) as stat_avg_total,
+            ROUND(AVG(deep) OVER (), 2) as stat_avg_deep,
+            ROUND(AVG(rem) OVER (), 2) as stat_avg_rem
+        FROM periods
+        ORDER BY period DESC
+    """,
+}
+
+class SharedConnection:
+    """
+    Read-only DuckDB connection shared across requests.
+    
+    Each request gets its own cursor on one long-lived connection, so the
+    catalog and buffer pool are loaded once instead of on every request.
+    DuckDB still takes a file lock in read-only mode, which would stop
+    daily_import.py from opening the database for writing, so the
+    connection is closed after DB_IDLE_TIMEOUT seconds without requests
+    and reopened on demand.
+    """
+    
+    def __init__(self, path: str, idle_timeout: float):
+        self.path = path
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._conn = None
+        self._active = 0
+        self._idle_timer = None
+    
+    @contextmanager
+    def cursor(self):
+        """Yield a cursor on the shared connection, opening it if needed"""
+        with self._lock:
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            if self._conn is None:
+                self._conn = duckdb.connect(self.path, read_only=True)
+            cursor = self._conn.cursor()
+            self._active += 1
         
-        conn.close()
-        return [{"date": str(r[0]), "value": float(r[1])} for r in result]
-    except Exception as e:
-        print(f"Error getting sparkline for {metric}: {e}")
-        return []
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+            with self._lock:
+                self._active -= 1
+                if self._active == 0:
+                    self._idle_timer = threading.Timer(self.idle_timeout, self._close_if_idle)
+                    self._idle_timer.daemon = True
+                    self._idle_timer.start()
+    
+    def _close_if_idle(self):
+        with self._lock:
+            if self._active == 0 and self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+DB = SharedConnection(DB_PATH, DB_IDLE_TIMEOUT)
+
+
+def get_cursor():
+    """FastAPI dependency: a cursor on the shared read-only connection"""
+    with DB.cursor() as cursor:
+        yield cursor
+
+
+def html_response(body: bytes) -> Response:
+    """Serve a preloaded page with a one-hour browser cache"""
+    return Response(body, media_type="text/html", headers={"Cache-Control": HTML_CACHE_CONTROL})
+
+
+def json_response(payload, status_code: int = 200) -> Response:
+    """Serialize with orjson directly, skipping FastAPI's jsonable_encoder"""
+    return Response(orjson.dumps(payload), status_code=status_code, media_type="application/json")
+
+
+def stream_detail(stats: Dict, chart_type: str, data: Iterable[Dict]):
+    """Yield a detail payload as JSON: stats and type first, then one chunk per data row"""
+    yield b'{"stats":' + orjson.dumps(stats, option=orjson.OPT_SERIALIZE_NUMPY) + b',"type":' + orjson.dumps(chart_type) + b',"data":['
+    for i, row in enumerate(data):
+        yield (b"," if i else b"") + orjson.dumps(row)
+    yield b"]}"
+
+
+def detail_response(stats: Dict, chart_type: str, data: Iterable[Dict]) -> StreamingResponse:
+    """Stream a detail payload so the headline stats reach the client before the rows"""
+    return StreamingResponse(stream_detail(stats, chart_type, data), media_type="application/json")
+
+
+# (expires_at, body, etag) for the last successful overview, or None
+_overview_cache = None
+
+
+def get_sparklines(conn) -> Dict[str, List[Dict]]:
+    """Get sparkline data (last 7 days) for all overview metrics in one pass"""
+    result = conn.execute("""
+        SELECT
+            metric,
+            CAST(date AS VARCHAR) as date,
+            CASE WHEN metric IN ('Active Energy', 'Step Count')
+                 THEN sum_value ELSE avg_value END as value
+        FROM daily_metric_summary 
+        WHERE metric IN ('Active Energy', 'Step Count', 'Resting Heart Rate', 'Heart Rate Variability')
+        AND date > CURRENT_DATE - INTERVAL '7 days'
+        ORDER BY metric, date
+    """).fetchall()
+    
+    sparklines = {
+        "Active Energy": [],
+        "Step Count": [],
+        "Resting Heart Rate": [],
+        "Heart Rate Variability": [],
+    }
+    for metric, date, value in result:
+        sparklines[metric].append({"date": date, "value": value})
+    return sparklines
 
 
 @app.get("/")
 async def read_root():
     """Serve index.html"""
-    return FileResponse("static/index.html")
+    return html_response(INDEX_HTML)
 
 
 @app.get("/detail.html")
 async def read_detail():
     """Serve detail.html"""
-    return FileResponse("static/detail.html")
+    return html_response(DETAIL_HTML)
 
 
-@app.get("/api/overview")
-async def get_overview():
-    """Get overview data for all 5 metrics"""
+def build_overview(conn) -> Response:
+    """Query and shape the overview payload (blocking; run in a worker thread)"""
     try:
-        conn = duckdb.connect(DB_PATH, read_only=True)
-        
-        # Active Energy - Today's total
+        # All headline numbers in a single pass over the daily summary:
+        # - Active Energy / Steps: today's total
+        # - Resting HR / HRV: 7-day average, weighted by readings per day
+        # - Sleep: latest total plus the stage breakdown for that night
         result = conn.execute("""
-            SELECT SUM(value) as total
-            FROM readings 
-            WHERE metric = 'Active Energy' 
-            AND DATE(timestamp) = CURRENT_DATE
-        """).fetchone()
-        calories_value = int(result[0]) if result[0] else 0
-        
-        # Steps - Today's total
-        result = conn.execute("""
-            SELECT SUM(value) as total
-            FROM readings 
-            WHERE metric = 'Step Count' 
-            AND DATE(timestamp) = CURRENT_DATE
-        """).fetchone()
-        steps_value = int(result[0]) if result[0] else 0
-        
-        # Resting HR - Latest
-        result = conn.execute("""
-            SELECT AVG(value) as avg_hr
-            FROM readings 
-            WHERE metric = 'Resting Heart Rate' 
-            AND timestamp > NOW() - INTERVAL '7 days'
+            WITH latest_sleep AS (
+                SELECT MAX(date) as d
+                FROM daily_metric_summary 
+                WHERE metric LIKE 'Sleep Analysis%'
+            )
+            SELECT 
+                SUM(sum_value) FILTER (WHERE metric = 'Active Energy' AND date = CURRENT_DATE) as calories,
+                SUM(sum_value) FILTER (WHERE metric = 'Step Count' AND date = CURRENT_DATE) as steps,
+                SUM(sum_value) FILTER (WHERE metric = 'Resting Heart Rate')
+                    / SUM(reading_count) FILTER (WHERE metric = 'Resting Heart Rate') as resting_hr,
+                SUM(sum_value) FILTER (WHERE metric = 'Heart Rate Variability')
+                    / SUM(reading_count) FILTER (WHERE metric = 'Heart Rate Variability') as hrv,
+                ARG_MAX(max_value, date) FILTER (WHERE metric = 'Sleep Analysis [Total]') as sleep_total,
+                MAX(max_value) FILTER (WHERE metric = 'Sleep Analysis [Deep]' AND date = latest_sleep.d) as deep,
+                MAX(max_value) FILTER (WHERE metric = 'Sleep Analysis [REM]' AND date = latest_sleep.d) as rem,
+                MAX(max_value) FILTER (WHERE metric = 'Sleep Analysis [Core]' AND date = latest_sleep.d) as core
+            FROM daily_metric_summary, latest_sleep
+            WHERE metric LIKE 'Sleep Analysis%'
+            OR (
+                metric IN ('Active Energy', 'Step Count', 'Resting Heart Rate', 'Heart Rate Variability')
+                AND date > CURRENT_DATE - INTERVAL '7 days'
+            )
         """).fetchone()
-        resting_hr_value = round(result[0], 1) if result[0] else 0.0
+        calories, steps, resting_hr, hrv, sleep_total, deep, rem, core = result
         
-        # HRV - 7-day average
-        result = conn.execute("""
-            SELECT AVG(value) as avg_hrv
-            FROM readings 
-            WHERE metric = 'Heart Rate Variability' 
-            AND timestamp > NOW() - INTERVAL '7 days'
-        """).fetchone()
-        hrv_value = round(result[0], 1) if result[0] else 0.0
+        calories_value = int(calories) if calories else 0
+        steps_value = int(steps) if steps else 0
+        resting_hr_value = round(resting_hr, 1) if resting_hr else 0.0
+        hrv_value = round(hrv, 1) if hrv else 0.0
         
-        # Sleep - Latest
-        result = conn.execute("""
-            SELECT value
-            FROM readings 
-            WHERE metric = 'Sleep Analysis [Total]'
-            ORDER BY timestamp DESC 
-            LIMIT 1
-        """).fetchone()
-        sleep_total_hours = float(result[0]) if result and result[0] else 7.5
+        sleep_total_hours = float(sleep_total) if sleep_total else 7.5
         sleep_hours = int(sleep_total_hours)
         sleep_minutes = int((sleep_total_hours - sleep_hours) * 60)
         
-        # Sleep breakdown
-        result = conn.execute("""
-            SELECT 
-                MAX(CASE WHEN metric = 'Sleep Analysis [Deep]' THEN value ELSE 0 END) as deep,
-                MAX(CASE WHEN metric = 'Sleep Analysis [REM]' THEN value ELSE 0 END) as rem,
-                MAX(CASE WHEN metric = 'Sleep Analysis [Core]' THEN value ELSE 0 END) as core
-            FROM readings 
-            WHERE metric LIKE 'Sleep Analysis%'
-            AND timestamp = (SELECT MAX(timestamp) FROM readings WHERE metric LIKE 'Sleep Analysis%')
-        """).fetchone()
-        
-        if result:
-            sleep_deep = int(result[0] * 60) if result[0] else int(sleep_hours * 60 * 0.2)
-            sleep_rem = int(result[1] * 60) if result[1] else int(sleep_hours * 60 * 0.25)
-            sleep_core = int(result[2] * 60) if result[2] else int(sleep_hours * 60 * 0.55)
-        else:
-            sleep_deep = int(sleep_hours * 60 * 0.2)
-            sleep_rem = int(sleep_hours * 60 * 0.25)
-            sleep_core = int(sleep_hours * 60 * 0.55)
+        # Fall back to typical stage proportions when the breakdown is missing
+        sleep_deep = int(deep * 60) if deep else int(sleep_hours * 60 * 0.2)
+        sleep_rem = int(rem * 60) if rem else int(sleep_hours * 60 * 0.25)
+        sleep_core = int(core * 60) if core else int(sleep_hours * 60 * 0.55)
         
-        conn.close()
+        sparklines = get_sparklines(conn)
         
-        return JSONResponse({
+        return json_response({
             "energy": {
                 "value": calories_value,
                 "unit": "cal",
-                "sparkline": get_sparkline_data("Active Energy")
+                "sparkline": sparklines["Active Energy"]
             },
             "steps": {
                 "value": steps_value,
                 "unit": "steps",
-                "sparkline": get_sparkline_data("Step Count")
+                "sparkline": sparklines["Step Count"]
             },
             "heart_rate": {
                 "value": resting_hr_value,
                 "unit": "bpm",
-                "sparkline": get_sparkline_data("Resting Heart Rate")
+                "sparkline": sparklines["Resting Heart Rate"]
             },
             "hrv": {
                 "value": hrv_value,
                 "unit": "ms",
-                "sparkline": get_sparkline_data("Heart Rate Variability")
+                "sparkline": sparklines["Heart Rate Variability"]
             },
             "sleep": {
                 "hours": sleep_hours,
@@ -188,183 +388,177 @@ async def get_overview():
     
     except Exception as e:
         print(f"Error in /api/overview: {e}")
-        return JSONResponse({"error": str(e)}, status_code=500)
+        return json_response({"error": str(e)}, status_code=500)
 
 
-@app.get("/api/detail/{metric}")
-async def get_detail(metric: str, range: str = "week"):
-    """Get detail data for a specific metric"""
-    try:
-        conn = duckdb.connect(DB_PATH, read_only=True)
-        
-        # Map time ranges to SQL intervals and aggregation (matching Reflex logic)
-        range_config = {
-            "day": ("7 days", "DATE(timestamp)"),
-            "week": ("4 weeks", "DATE(timestamp)"),
-            "month": ("3 months", "DATE(timestamp)"),
-            "3month": ("6 months", "DATE(timestamp)"),
-            "6month": ("12 months", "DATE_TRUNC('week', DATE(timestamp))"),
-            "year": ("2 years", "DATE_TRUNC('week', DATE(timestamp))"),
-            "5year": ("5 years", "DATE_TRUNC('week', DATE(timestamp)) - INTERVAL '7 days' * (EXTRACT(WEEK FROM DATE(timestamp))::int % 2)"),
-            "all": ("100 years", "DATE_TRUNC('month', DATE(timestamp))"),
+# Detail response shapers: NumPy result columns -> (stats, chart type, data rows).
+# Results are already truncated/rounded in SQL; stats are the first row's
+# stat_* columns, serialized as NumPy scalars by orjson. Periods are cast to
+# VARCHAR in SQL, which matches the str() formatting of DATE/TIMESTAMP values.
+# Data rows are generators, serialized one at a time as the response streams.
+
+def shape_steps(arr):
+    """Step totals per period"""
+    data = (
+        {"date": d, "value": v}
+        for d, v in zip(arr["period"].tolist(), arr["total_steps"].tolist())
+    )
+    if len(arr["period"]):
+        stats = {
+            "total": arr["stat_total"][0],
+            "avg": arr["stat_avg"][0],
+            "max": arr["stat_max"][0],
+            "min": arr["stat_min"][0],
         }
-        
-        interval, group_by = range_config.get(range, ("7 days", "DATE(timestamp)"))
-        
-        if metric == "steps":
-            # Query daily steps
-            result = conn.execute(f"""
-                SELECT {group_by} as period, SUM(value) as total_steps
-                FROM readings 
-                WHERE metric = 'Step Count' 
-                AND timestamp > NOW() - INTERVAL '{interval}'
-                GROUP BY {group_by}
-                ORDER BY period DESC
-                LIMIT 150
-            """).fetchall()
-            
-            data = [{"date": str(r[0]), "value": int(r[1])} for r in result]
-            
-            # Calculate stats
-            if result:
-                values = [r[1] for r in result]
-                stats = {
-                    "total": int(sum(values)),
-                    "avg": int(sum(values) / len(values)),
-                    "max": int(max(values)),
-                    "min": int(min(values)),
-                }
-            else:
-                stats = {"total": 0, "avg": 0, "max": 0, "min": 0}
-            
-            conn.close()
-            return JSONResponse({"data": data, "stats": stats, "type": "bar"})
-        
-        elif metric == "energy":
-            # Query daily energy
-            result = conn.execute(f"""
-                SELECT {group_by} as date, SUM(value) as total_calories
-                FROM readings 
-                WHERE metric = 'Active Energy' 
-                AND timestamp > NOW() - INTERVAL '{interval}'
-                GROUP BY {group_by}
-                ORDER BY date DESC
-                LIMIT 150
-            """).fetchall()
-            
-            data = [{"date": str(r[0]), "value": int(r[1])} for r in result]
-            
-            if result:
-                values = [r[1] for r in result]
-                stats = {
-                    "total": int(sum(values)),
-                    "avg": int(sum(values) / len(values)),
-                    "max": int(max(values)),
-                }
-            else:
-                stats = {"total": 0, "avg": 0, "max": 0}
-            
-            conn.close()
-            return JSONResponse({"data": data, "stats": stats, "type": "bar"})
-        
-        elif metric == "heart":
-            # Query resting heart rate
-            result = conn.execute(f"""
-                SELECT {group_by} as date, AVG(value) as avg_hr, MIN(value) as min_hr, MAX(value) as max_hr
-                FROM readings 
-                WHERE metric = 'Resting Heart Rate' 
-                AND timestamp > NOW() - INTERVAL '{interval}'
-                GROUP BY {group_by}
-                ORDER BY date DESC
-                LIMIT 150
-            """).fetchall()
-            
-            data = [{"date": str(r[0]), "value": round(float(r[1]), 1)} for r in result]
-            
-            if result:
-                avg_vals = [r[1] for r in result]
-                stats = {
-                    "avg": round(sum(avg_vals) / len(avg_vals), 1),
-                    "min": round(min(r[2] for r in result), 1),
-                    "max": round(max(r[3] for r in result), 1),
-                }
-            else:
-                stats = {"avg": 0, "min": 0, "max": 0}
-            
-            conn.close()
-            return JSONResponse({"data": data, "stats": stats, "type": "line"})
-        
-        elif metric == "hrv":
-            result = conn.execute(f"""
-                SELECT {group_by} as date, AVG(value) as avg_hrv
-                FROM readings 
-                WHERE metric = 'Heart Rate Variability' 
-                AND timestamp > NOW() - INTERVAL '{interval}'
-                GROUP BY {group_by}
-                ORDER BY date DESC
-                LIMIT 150
-            """).fetchall()
-            
-            data = [{"date": str(r[0]), "value": round(float(r[1]), 1)} for r in result]
-            
-            if result:
-                values = [r[1] for r in result]
-                stats = {
-                    "avg": round(sum(values) / len(values), 1),
-                    "min": round(min(values), 1),
-                    "max": round(max(values), 1),
-                }
-            else:
-                stats = {"avg": 0, "min": 0, "max": 0}
-            
-            conn.close()
-            return JSONResponse({"data": data, "stats": stats, "type": "line"})
-        
-        elif metric == "sleep":
-            # Query sleep breakdown
-            result = conn.execute(f"""
-                SELECT 
-                    {group_by} as date,
-                    MAX(CASE WHEN metric = 'Sleep Analysis [REM]' THEN value ELSE 0 END) as rem,
-                    MAX(CASE WHEN metric = 'Sleep Analysis [Deep]' THEN value ELSE 0 END) as deep,
-                    MAX(CASE WHEN metric = 'Sleep Analysis [Core]' THEN value ELSE 0 END) as core
-                FROM readings 
-                WHERE metric LIKE 'Sleep Analysis%'
-                AND timestamp > NOW() - INTERVAL '{interval}'
-                GROUP BY {group_by}
-                ORDER BY date DESC
-                LIMIT 150
-            """).fetchall()
-            
-            data = [
-                {
-                    "date": str(r[0]),
-                    "rem": round(float(r[1]), 2),
-                    "deep": round(float(r[2]), 2),
-                    "core": round(float(r[3]), 2),
-                    "total": round(float(r[1]) + float(r[2]) + float(r[3]), 2),
-                }
-                for r in result
-            ]
-            
-            if result:
-                totals = [r[1] + r[2] + r[3] for r in result]
-                deep_vals = [r[2] for r in result]
-                rem_vals = [r[1] for r in result]
-                stats = {
-                    "avg_total": round(sum(totals) / len(totals), 2),
-                    "avg_deep": round(sum(deep_vals) / len(deep_vals), 2),
-                    "avg_rem": round(sum(rem_vals) / len(rem_vals), 2),
-                }
-            else:
-                stats = {"avg_total": 0, "avg_deep": 0, "avg_rem": 0}
-            
-            conn.close()
-            return JSONResponse({"data": data, "stats": stats, "type": "stacked"})
-        
-        else:
-            return JSONResponse({"error": "Unknown metric"}, status_code=400)
+    else:
+        stats = {"total": 0, "avg": 0, "max": 0, "min": 0}
+    return stats, "bar", data
+
+
+def shape_energy(arr):
+    """Active energy totals per period"""
+    data = (
+        {"date": d, "value": v}
+        for d, v in zip(arr["period"].tolist(), arr["total_calories"].tolist())
+    )
+    if len(arr["period"]):
+        stats = {
+            "total": arr["stat_total"][0],
+            "avg": arr["stat_avg"][0],
+            "max": arr["stat_max"][0],
+        }
+    else:
+        stats = {"total": 0, "avg": 0, "max": 0}
+    return stats, "bar", data
+
+
+def shape_heart(arr):
+    """Resting heart rate per period"""
+    data = (
+        {"date": d, "value": v}
+        for d, v in zip(arr["period"].tolist(), arr["avg_hr"].tolist())
+    )
+    if len(arr["period"]):
+        stats = {
+            "avg": arr["stat_avg"][0],
+            "min": arr["stat_min"][0],
+            "max": arr["stat_max"][0],
+        }
+    else:
+        stats = {"avg": 0, "min": 0, "max": 0}
+    return stats, "line", data
+
+
+def shape_hrv(arr):
+    """Heart rate variability per period"""
+    data = (
+        {"date": d, "value": v}
+        for d, v in zip(arr["period"].tolist(), arr["avg_hrv"].tolist())
+    )
+    if len(arr["period"]):
+        stats = {
+            "avg": arr["stat_avg"][0],
+            "min": arr["stat_min"][0],
+            "max": arr["stat_max"][0],
+        }
+    else:
+        stats = {"avg": 0, "min": 0, "max": 0}
+    return stats, "line", data
+
+
+def shape_sleep(arr):
+    """Sleep stage breakdown per period"""
+    data = (
+        {"date": d, "rem": r, "deep": dp, "core": c, "total": t}
+        for d, r, dp, c, t in zip(
+            arr["period"].tolist(),
+            arr["rem"].tolist(),
+            arr["deep"].tolist(),
+            arr["core"].tolist(),
+            arr["total"].tolist(),
+        )
+    )
+    if len(arr["period"]):
+        stats = {
+            "avg_total": arr["stat_avg_total"][0],
+            "avg_deep": arr["stat_avg_deep"][0],
+            "avg_rem": arr["stat_avg_rem"][0],
+        }
+    else:
+        stats = {"avg_total": 0, "avg_deep": 0, "avg_rem": 0}
+    return stats, "stacked", data
+
+
+DETAIL_SHAPERS = {
+    "steps": shape_steps,
+    "energy": shape_energy,
+    "heart": shape_heart,
+    "hrv": shape_hrv,
+    "sleep": shape_sleep,
+}
+
+# (metric, range) -> (query text, lookback interval, shaper), built once at
+# import so a request is a single dict lookup with no SQL assembly or branching
+DETAIL_HANDLERS = {
+    (metric, range): (
+        DETAIL_SQL[metric].format(group_by=PERIOD_EXPRESSIONS[granularity]),
+        interval,
+        DETAIL_SHAPERS[metric],
+    )
+    for metric in DETAIL_SQL
+    for range, (interval, granularity) in RANGE_CONFIG.items()
+}
+
+
+def build_detail(conn, metric: str, range: str) -> Response:
+    """Query and shape the detail payload (blocking; run in a worker thread)"""
+    # Unknown ranges fall back to the last 7 days
+    handler = DETAIL_HANDLERS.get((metric, range if range in RANGE_CONFIG else "day"))
+    if handler is None:
+        return json_response({"error": "Unknown metric"}, status_code=400)
+    
+    sql, interval, shaper = handler
+    try:
+        arr = conn.execute(sql, [interval]).fetchnumpy()
+        return detail_response(*shaper(arr))
     
     except Exception as e:
         print(f"Error in /api/detail/{metric}: {e}")
-        return JSONResponse({"error": str(e)}, status_code=500)
+        return json_response({"error": str(e)}, status_code=500)
+
+
+def refresh_overview() -> Response:
+    """Rebuild the overview and cache it if the query succeeded"""
+    global _overview_cache
+    with DB.cursor() as conn:
+        response = build_overview(conn)
+    if response.status_code == 200:
+        etag = f'W/"{hashlib.blake2b(response.body, digest_size=8).hexdigest()}"'
+        _overview_cache = (time.monotonic() + OVERVIEW_CACHE_TTL, response.body, etag)
+    return response
+
+
+@app.get("/api/overview")
+async def get_overview(request: Request):
+    """Get overview data for all 5 metrics"""
+    cache = _overview_cache
+    if cache is None or time.monotonic() >= cache[0]:
+        response = await asyncio.to_thread(refresh_overview)
+        if response.status_code != 200:
+            return response
+        cache = _overview_cache
+    
+    _, body, etag = cache
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
+
+@app.get("/api/detail/{metric}")
+async def get_detail(
+    metric: str,
+    range: str = "week",
+    conn: duckdb.DuckDBPyConnection = Depends(get_cursor),
+):
+    """Get detail data for a specific metric"""
+    return await asyncio.to_thread(build_detail, conn, metric, range)
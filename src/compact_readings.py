@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Rewrite the readings table in (metric, timestamp) order.
+
+Imports append rows in file order, so every metric ends up spread across
+all of DuckDB's row groups and a `metric = ... AND timestamp > ...` filter
+can't skip any of them. Storing rows sorted by (metric, timestamp) keeps
+each row group's min/max zonemaps narrow on both columns so those scans
+prune most of the table.
+
+Rewriting the whole table (and its indexes) is only worth it once enough
+unsorted rows have piled up, so daily_import.py calls
+compact_readings_if_needed(), which compacts once readings has grown by
+COMPACT_MIN_ROWS / COMPACT_FRACTION since the last compaction (recorded in
+readings_compaction). Running this script compacts unconditionally.
+
+The table is rewritten in place (not CREATE OR REPLACE) so the primary key
+and the idx_readings_* indexes are kept. Deleting and re-inserting the same
+primary keys in one transaction needs DuckDB 1.2 or later.
+
+Usage:
+    python src/compact_readings.py
+"""
+
+import duckdb
+import sys
+from config import get_db_path
+
+DB_PATH = get_db_path()
+
+# Compact once this many readings were added since the last compaction
+# (one DuckDB row group; below that, sorting can't let a scan skip anything)
+COMPACT_MIN_ROWS = 122_880
+
+# ...and they make up at least this share of the table
+COMPACT_FRACTION = 0.1
+
+
+def compact_readings(conn):
+    """
+    Re-insert all readings sorted by (metric, timestamp) in one transaction.
+
+    Args:
+        conn: Read-write DuckDB connection
+
+    Returns:
+        int: Number of readings rewritten
+    """
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        conn.execute("""
+            CREATE TEMP TABLE readings_sorted AS
+            SELECT * FROM readings
+            ORDER BY metric, timestamp
+        """)
+        conn.execute("DELETE FROM readings")
+        conn.execute("INSERT INTO readings SELECT * FROM readings_sorted")
+        conn.execute("DROP TABLE readings_sorted")
+        rows = conn.execute("SELECT COUNT(*) FROM readings").fetchone()[0]
+        ensure_compaction_log(conn)
+        conn.execute("""
+            INSERT INTO readings_compaction (compacted_at, row_count)
+            VALUES (current_timestamp, ?)
+        """, [rows])
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    return rows
+
+
+def ensure_compaction_log(conn):
+    """Create readings_compaction (one row per compaction) if it doesn't exist."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS readings_compaction (
+            compacted_at TIMESTAMP NOT NULL,
+            row_count BIGINT NOT NULL
+        )
+    """)
+
+
+def compact_readings_if_needed(conn):
+    """
+    Compact readings only if enough rows were added since the last compaction.
+
+    Rows added are estimated from the table's row count now versus at the
+    last compaction (a database never compacted counts all its rows).
+
+    Args:
+        conn: Read-write DuckDB connection
+
+    Returns:
+        tuple: (rows rewritten or None if skipped, rows added since last compaction)
+    """
+    ensure_compaction_log(conn)
+    total, compacted = conn.execute("""
+        SELECT
+            (SELECT COUNT(*) FROM readings),
+            (SELECT row_count FROM readings_compaction ORDER BY compacted_at DESC LIMIT 1)
+    """).fetchone()
+    added = max(total - (compacted or 0), 0)
+
+    if added < max(COMPACT_MIN_ROWS, COMPACT_FRACTION * total):
+        return None, added
+    return compact_readings(conn), added
+
+
+if __name__ == "__main__":
+    conn = duckdb.connect(str(DB_PATH))
+    try:
+        rows = compact_readings(conn)
+        conn.execute("CHECKPOINT")
+        print(f"✅ readings compacted ({rows} rows sorted by metric, timestamp)")
+    except Exception as e:
+        print(f"❌ Error compacting readings: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
@@ -6,14 +6,21 @@ All other scripts should import from this module instead of hardcoding paths.
 """
 
 import yaml
+from functools import lru_cache
 from pathlib import Path
 
 # Config file is in project root
 CONFIG_PATH = Path(__file__).parent.parent / "config.yaml"
 
 
+@lru_cache(maxsize=1)
 def load_config():
-    """Load and parse config.yaml"""
+    """
+    Load and parse config.yaml.
+    
+    The file is read once per process; every getter below shares the
+    parsed result. Treat the returned dict as read-only.
+    """
     if not CONFIG_PATH.exists():
         raise FileNotFoundError(
             f"config.yaml not found at {CONFIG_PATH}. "
@@ -10,10 +10,14 @@ Usage:
     python src/daily_import.py --dry-run
 """
 
-import duckdb
 import argparse
+import errno
+import io
+import os
 import shutil
-import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
 import sys
@@ -25,28 +29,34 @@ from import_medications import import_medications_csv
 from import_workouts import import_workouts_csv
 from import_cycletracking import import_cycletracking_csv
 from validate import run_validation
+from metric_summary import ensure_daily_metric_summary, refresh_daily_metric_summary
+from compact_readings import compact_readings_if_needed
+from migrate_add_file_fingerprint import add_fingerprint_columns
+from db import get_conn
+from file_hash import calculate_file_hash
 from config import get_db_path, get_icloud_folder
 
 # Paths from config
 DB_PATH = get_db_path()
 ICLOUD_FOLDER = get_icloud_folder()
 
-def calculate_file_hash(file_path):
+def scan_folder(folder_path):
     """
-    Calculate SHA-256 hash of a file.
+    List the files (not directories) in a folder in a single os.scandir pass.
     
-    Args:
-        file_path: Path to file
+    DirEntry carries the file type from the directory listing, so telling
+    files from directories doesn't cost a stat() per entry. The imported/
+    archive folder is skipped by name before even that check.
     
     Returns:
-        str: Hex digest of file hash
+        list: os.DirEntry objects, sorted by name
     """
-    sha256_hash = hashlib.sha256()
-    with open(file_path, "rb") as f:
-        # Read file in chunks for memory efficiency
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
+    with os.scandir(folder_path) as entries:
+        files = [
+            entry for entry in entries
+            if entry.name != "imported" and not entry.is_dir()
+        ]
+    return sorted(files, key=lambda entry: entry.name)
 
 
 def get_csv_files(folder_path):
@@ -54,33 +64,128 @@ def get_csv_files(folder_path):
     Find all CSV files in the folder.
     
     Returns:
-        list: List of Path objects for CSV files
+        list: (Path, os.stat_result) tuples for CSV files, sorted by name
     """
     if not folder_path.exists():
         print(f"❌ Folder not found: {folder_path}")
         return []
     
-    csv_files = sorted(folder_path.glob("*.csv"))
-    return csv_files
+    return [
+        (Path(entry.path), entry.stat())
+        for entry in scan_folder(folder_path)
+        if entry.name.endswith(".csv")
+    ]
 
-def get_imported_files():
+def get_imported_files(filenames, conn=None):
     """
-    Get mapping of already-imported files to their hashes from database.
+    Get hashes for whichever of the given files have already been imported.
+    
+    The candidate names are bound as one list parameter, so only rows for
+    files currently in the folder are fetched rather than the whole import
+    history.
+    
+    Args:
+        filenames: List of CSV filenames found in the folder
+        conn: Open DuckDB connection to use (default: the shared db.get_conn() connection)
     
     Returns:
-        dict: {filename: file_hash} mapping (hash may be None for old imports)
+        dict: {filename: (file_hash, file_size, file_mtime_ns)} mapping
+              (any of these may be None for older imports)
     """
-    conn = duckdb.connect(str(DB_PATH))
-    try:
-        result = conn.execute("SELECT filename, file_hash FROM imports").fetchall()
-        return {row[0]: row[1] for row in result}
-    finally:
-        conn.close()
+    if conn is None:
+        conn = get_conn()
+    result = conn.execute("""
+        SELECT filename, file_hash, file_size, file_mtime_ns
+        FROM imports
+        WHERE filename = ANY(?)
+    """, [filenames]).fetchall()
+    return {row[0]: row[1:] for row in result}
+
+def get_imported_hashes(file_hashes, conn):
+    """
+    Look up already-imported files by content hash instead of name.
+    
+    Args:
+        file_hashes: List of SHA-256 hashes of files not yet imported by name
+        conn: Open DuckDB connection
+    
+    Returns:
+        dict: {file_hash: (filename, source)} of the first import with that hash
+    """
+    result = conn.execute("""
+        SELECT DISTINCT ON (file_hash) file_hash, filename, source
+        FROM imports
+        WHERE file_hash = ANY(?)
+        ORDER BY file_hash, import_id
+    """, [file_hashes]).fetchall()
+    return {row[0]: row[1:] for row in result}
+
+def record_renamed(renamed, conn):
+    """
+    Log renamed copies of already-imported files without importing them.
+    
+    Each copy gets its own imports row (0 rows added, same hash and source
+    as the original), so from then on it is handled like any other
+    imported file: fingerprinted, skipped and moved to imported/.
+    
+    Args:
+        renamed: {filename: (file_hash, source)} mapping
+        conn: Open DuckDB connection
+    """
+    if not renamed:
+        return
+    
+    names = list(renamed)
+    conn.execute("""
+        INSERT INTO imports (filename, imported_at, rows_added, source, file_hash)
+        SELECT filename, ?, 0, source, file_hash
+        FROM (
+            SELECT
+                unnest(?) as filename,
+                unnest(?) as source,
+                unnest(?) as file_hash
+        )
+    """, [
+        datetime.now(),
+        names,
+        [renamed[name][1] for name in names],
+        [renamed[name][0] for name in names],
+    ])
+
+def record_fingerprints(fingerprints, conn):
+    """
+    Store the size and mtime each file had when it was imported or verified.
+    
+    Args:
+        fingerprints: {filename: (file_size, file_mtime_ns)} mapping
+        conn: Open DuckDB connection
+    """
+    if not fingerprints:
+        return
+    
+    names = list(fingerprints)
+    conn.execute("""
+        UPDATE imports
+        SET file_size = f.file_size, file_mtime_ns = f.file_mtime_ns
+        FROM (
+            SELECT
+                unnest(?) as filename,
+                unnest(?) as file_size,
+                unnest(?) as file_mtime_ns
+        ) f
+        WHERE imports.filename = f.filename
+    """, [
+        names,
+        [fingerprints[name][0] for name in names],
+        [fingerprints[name][1] for name in names],
+    ])
+
 
 def run_daily_import(dry_run=False):
     """
     Scan for new CSV files and import them.
-    Detects changes via file hash and re-imports updated files.
+    Detects changes via file hash and re-imports updated files. Files whose
+    size and mtime match what was recorded at import are not re-hashed.
     
     Args:
         dry_run: If True, only report what would be imported
@@ -88,6 +193,20 @@ def run_daily_import(dry_run=False):
     Returns:
         dict: Summary statistics
     """
+    # One connection for the whole run; the importers, the post-import
+    # compaction/summary refresh and the validation afterwards all share it
+    # instead of reconnecting per file
+    conn = get_conn()
+    
+    # Bring databases created by older versions up to date: the imports
+    # table's size/mtime fingerprint columns and the dashboard's rollup
+    added = add_fingerprint_columns(conn)
+    if added:
+        print(f"🔨 Added {', '.join(added)} to the imports table")
+    summary_rows = ensure_daily_metric_summary(conn)
+    if summary_rows is not None:
+        print(f"📊 Built daily_metric_summary ({summary_rows} rows)")
+    
     print(f"🔍 Scanning: {ICLOUD_FOLDER}")
     
     # Find all CSVs
@@ -99,30 +218,71 @@ def run_daily_import(dry_run=False):
     
     print(f"📂 Found {len(csv_files)} CSV file(s)")
     
-    # Get already-imported files with their hashes
-    imported = get_imported_files()
+    # Get already-imported files with their hashes and fingerprints
+    imported = get_imported_files([f.name for f, _ in csv_files], conn)
     
     # Categorize files: new, changed, or unchanged
     new_files = []
     changed_files = []
     unchanged_count = 0
+    fingerprints = {}
+    verified = {}
     
     print("🔐 Computing file hashes...")
-    for csv_file in csv_files:
-        file_hash = calculate_file_hash(csv_file)
+    needs_hash = []
+    for csv_file, file_stat in csv_files:
+        fingerprint = (file_stat.st_size, file_stat.st_mtime_ns)
+        previous = imported.get(csv_file.name)
+        
+        if previous and previous[0] is not None and previous[1:] == fingerprint:
+            # Same size and mtime as at import - unchanged, no need to hash
+            unchanged_count += 1
+            continue
         
-        if csv_file.name not in imported:
+        # Keep the lookup result for categorizing once the hash is known
+        needs_hash.append((csv_file, fingerprint, previous))
+        fingerprints[csv_file.name] = fingerprint
+    
+    # Hash the remaining files in parallel; hashlib releases the GIL
+    # while hashing, so file reads and digests overlap across threads
+    hashes = []
+    if needs_hash:
+        with ThreadPoolExecutor(max_workers=min(8, len(needs_hash))) as pool:
+            hashes = list(pool.map(calculate_file_hash, [f for f, _, _ in needs_hash]))
+    
+    # A new name whose content was already imported (a renamed or
+    # re-exported copy) is matched by hash and not parsed again
+    new_hashes = [h for (_, _, previous), h in zip(needs_hash, hashes) if previous is None]
+    imported_hashes = get_imported_hashes(new_hashes, conn) if new_hashes else {}
+    renamed = {}
+    
+    for (csv_file, fingerprint, previous), file_hash in zip(needs_hash, hashes):
+        if previous is None and file_hash in imported_hashes:
+            # Same content as an earlier import under another name
+            original, source = imported_hashes[file_hash]
+            print(f"   ⏭️  {csv_file.name}: same content as {original}, skipping")
+            unchanged_count += 1
+            renamed[csv_file.name] = (file_hash, source)
+            verified[csv_file.name] = fingerprint
+        elif previous is None:
             # Brand new file
             new_files.append((csv_file, file_hash))
-        elif imported[csv_file.name] is None:
+        elif previous[0] is None:
             # Old import without hash - treat as changed to compute hash
             changed_files.append((csv_file, file_hash, "no_hash"))
-        elif imported[csv_file.name] != file_hash:
+        elif previous[0] != file_hash:
             # Hash mismatch - file has been updated
             changed_files.append((csv_file, file_hash, "hash_changed"))
         else:
-            # Hash matches - file unchanged
+            # Hash matches - file unchanged (record fingerprint for next time)
             unchanged_count += 1
+            verified[csv_file.name] = fingerprint
+    
+    print(f"   Hashed {len(fingerprints)} file(s), {len(csv_files) - len(fingerprints)} unchanged by size/mtime")
+    
+    if not dry_run:
+        record_renamed(renamed, conn)
+        record_fingerprints(verified, conn)
     
     stats = {
         "total": len(csv_files),
@@ -134,8 +294,6 @@ def run_daily_import(dry_run=False):
         "rows_added": 0
     }
     
-    files_to_import = new_files + [(f, h, "new") for f, h in new_files][:0] + changed_files
-    
     if not new_files and not changed_files:
         print("✨ No new or changed files to import (all up to date)")
         return stats
@@ -147,9 +305,11 @@ def run_daily_import(dry_run=False):
     
     if changed_files:
         print(f"\n🔄 Changed files to re-import: {len(changed_files)}")
-        for f, _, reason in changed_files:
+        for f, file_hash, reason in changed_files:
             if reason == "hash_changed":
                 print(f"   - {f.name} (hash changed - file updated)")
+                print(f"     Old hash: {imported[f.name][0]}")
+                print(f"     New hash: {file_hash}")
             else:
                 print(f"   - {f.name} (adding hash to existing import)")
     
@@ -157,41 +317,145 @@ def run_daily_import(dry_run=False):
         print("\n🏃 Dry run mode — no imports performed")
         return stats
     
-    # Import new files
-    if new_files:
-        print("\n⚙️  Importing new files...")
-        for csv_file, file_hash in new_files:
-            print(f"\n→ {csv_file.name}")
-            rows = import_file(csv_file, file_hash, is_reimport=False)
-            
-            if rows < 0:
-                stats["errors"] += 1
-            else:
-                stats["imported"] += 1
-                stats["rows_added"] += rows
+    # Group files by the table their importer writes to. Groups run in
+    # parallel; files within a group run one after another, since
+    # concurrent transactions inserting into the same table would conflict.
+    groups = {}
+    for csv_file, file_hash in new_files:
+        groups.setdefault(get_target_table(csv_file), []).append((csv_file, file_hash, False))
+    for csv_file, file_hash, _ in changed_files:
+        groups.setdefault(get_target_table(csv_file), []).append((csv_file, file_hash, True))
+    
+    print(f"\n⚙️  Importing {len(new_files) + len(changed_files)} file(s) in {len(groups)} parallel group(s)...")
+    # Each group's importer output is buffered and printed as one block, so
+    # lines from different files don't interleave in the log
+    with buffered_group_output(), ThreadPoolExecutor(max_workers=len(groups)) as pool:
+        for results, output in pool.map(lambda files: import_group(files, conn), groups.values()):
+            print(output, end="")
+            for csv_file, rows in results:
+                if rows < 0:
+                    stats["errors"] += 1
+                    del fingerprints[csv_file.name]
+                else:
+                    stats["imported"] += 1
+                    stats["rows_added"] += rows
+    
+    # Remember size/mtime of successfully imported files
+    record_fingerprints({
+        name: fingerprint for name, fingerprint in fingerprints.items()
+        if name not in verified
+    }, conn)
+    
+    # Keep readings sorted for zonemap pruning (once enough unsorted rows
+    # have built up), then rebuild the per-day rollup the dashboard reads from
+    if stats["imported"] > 0:
+        compacted, added = compact_readings_if_needed(conn)
+        if compacted is None:
+            print(f"\n🗜️  Skipped compaction ({added} readings added since the last one)")
+        else:
+            print(f"\n🗜️  Compacted readings ({compacted} rows sorted by metric, timestamp)")
+        summary_rows = refresh_daily_metric_summary(conn)
+        print(f"📊 Refreshed daily_metric_summary ({summary_rows} rows)")
     
-    # Re-import changed files
-    if changed_files:
-        print("\n⚙️  Re-importing changed files...")
-        for csv_file, file_hash, reason in changed_files:
-            print(f"\n🔄 {csv_file.name}")
-            if reason == "hash_changed":
-                old_hash = imported.get(csv_file.name, "unknown")
-                print(f"   Reason: File content changed")
-                print(f"   Old hash: {old_hash}")
-                print(f"   New hash: {file_hash}")
-            rows = import_file(csv_file, file_hash, is_reimport=True)
-            
+    return stats
+
+
+def get_target_table(csv_file):
+    """
+    Name of the table a file's importer inserts into.
+    
+    HealthKit, CycleTracking and unrecognised files all write to readings,
+    so they share a group.
+    """
+    if csv_file.name.startswith("Medications-"):
+        return "medications"
+    if csv_file.name.startswith("Workouts-"):
+        return "workouts"
+    return "readings"
+
+
+# Per-thread output buffer of the import group running on that thread
+_group_output = threading.local()
+
+
+class _GroupOutputStream:
+    """
+    Stand-in for sys.stdout/sys.stderr while import groups run.
+    
+    Writes from a thread running import_group() go to that group's buffer
+    (stdout and stderr alike, so tracebacks stay next to their file);
+    writes from any other thread pass through to the real stream.
+    """
+    
+    def __init__(self, stream):
+        self.stream = stream
+    
+    def write(self, text):
+        buffer = getattr(_group_output, "buffer", None)
+        return (self.stream if buffer is None else buffer).write(text)
+    
+    def flush(self):
+        if getattr(_group_output, "buffer", None) is None:
+            self.stream.flush()
+    
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+@contextmanager
+def buffered_group_output():
+    """Route import groups' prints into their own buffers (see import_group)."""
+    original = sys.stdout, sys.stderr
+    sys.stdout = _GroupOutputStream(sys.stdout)
+    sys.stderr = _GroupOutputStream(sys.stderr)
+    try:
+        yield
+    finally:
+        sys.stdout, sys.stderr = original
+
+
+def import_group(files, conn):
+    """
+    Import a group of files one after another (run in a worker thread).
+    
+    A DuckDB connection can't be used from several threads at once, so the
+    group works on its own cursor of the shared connection. Each file is
+    imported in its own transaction: its rows and imports-log entry are
+    written together, and a failed file is rolled back without undoing the
+    files imported before it.
+    
+    Args:
+        files: List of (csv_file, file_hash, is_reimport) tuples
+        conn: Shared DuckDB connection for the run
+    
+    Everything the group prints is collected in a buffer (when run under
+    buffered_group_output) and returned, for the caller to print as one block.
+    
+    Returns:
+        tuple: (list of (csv_file, rows added) per file, rows is -1 for files
+               that failed; the group's printed output)
+    """
+    results = []
+    _group_output.buffer = io.StringIO()
+    cursor = conn.cursor()
+    try:
+        for csv_file, file_hash, is_reimport in files:
+            print(f"\n{'🔄' if is_reimport else '→'} {csv_file.name}")
+            cursor.begin()
+            rows = import_file(csv_file, file_hash, is_reimport, cursor)
             if rows < 0:
-                stats["errors"] += 1
+                cursor.rollback()
             else:
-                stats["imported"] += 1
-                stats["rows_added"] += rows
-    
-    return stats
+                cursor.commit()
+            results.append((csv_file, rows))
+    finally:
+        cursor.close()
+        output = _group_output.buffer.getvalue()
+        _group_output.buffer = None
+    return results, output
 
 
-def import_file(csv_file, file_hash, is_reimport=False):
+def import_file(csv_file, file_hash, is_reimport=False, conn=None):
     """
     Route file to appropriate importer and handle the import.
     
@@ -199,26 +463,27 @@ def import_file(csv_file, file_hash, is_reimport=False):
         csv_file: Path to CSV file
         file_hash: SHA-256 hash of the file
         is_reimport: True if this is a re-import of an existing file
+        conn: Open DuckDB connection (default: each importer opens its own)
     
     Returns:
         int: Number of rows added, or -1 on error
     """
     # Route to appropriate importer based on filename
     if csv_file.name.startswith("Medications-"):
-        rows = import_medications_csv(csv_file, file_hash, is_reimport)
+        rows = import_medications_csv(csv_file, file_hash, is_reimport, conn=conn)
     elif csv_file.name.startswith("Workouts-"):
-        rows = import_workouts_csv(csv_file, file_hash, is_reimport)
+        rows = import_workouts_csv(csv_file, file_hash, is_reimport, conn=conn)
     elif csv_file.name.startswith("CycleTracking-"):
-        rows = import_cycletracking_csv(csv_file, file_hash, is_reimport)
+        rows = import_cycletracking_csv(csv_file, file_hash, is_reimport, conn=conn)
     elif csv_file.name.startswith("HealthMetrics-"):
-        rows = import_csv(csv_file, file_hash, is_reimport)
+        rows = import_csv(csv_file, file_hash, is_reimport, conn=conn)
     elif csv_file.name.startswith("HaishanYe_glucose_"):
         # Skip glucose files - handled separately by import_libre.py
         print(f"⏭️  Skipping glucose file (handled by import_libre.py)")
         return 0
     else:
         print(f"⚠️  Unknown file type, attempting HealthKit import...")
-        rows = import_csv(csv_file, file_hash, is_reimport)
+        rows = import_csv(csv_file, file_hash, is_reimport, conn=conn)
     
     return rows
 
@@ -237,15 +502,14 @@ def move_imported_files(dry_run=False):
         int: Number of files moved
     """
     imported_dir = ICLOUD_FOLDER / "imported"
-    imported_files_dict = get_imported_files()
+    candidates = [Path(entry.path) for entry in scan_folder(ICLOUD_FOLDER)]
+    imported_files_dict = get_imported_files([f.name for f in candidates if f.suffix == ".csv"])
 
     # Collect files to move:
     # 1. CSVs that are in the imports table
     # 2. JSON and ZIP files (not used by pipeline)
     files_to_move = []
-    for f in sorted(ICLOUD_FOLDER.iterdir()):
-        if f.is_dir():
-            continue
+    for f in candidates:
         if f.suffix == ".csv" and f.name in imported_files_dict:
             files_to_move.append(f)
         elif f.suffix in (".json", ".zip"):
@@ -267,7 +531,14 @@ def move_imported_files(dry_run=False):
     moved = 0
     for f in files_to_move:
         try:
-            shutil.move(str(f), str(imported_dir / f.name))
+            # imported/ is inside the scanned folder, so a plain rename
+            # normally works; fall back to copy+delete across devices
+            try:
+                os.rename(f, imported_dir / f.name)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                shutil.move(str(f), str(imported_dir / f.name))
             moved += 1
         except Exception as e:
             print(f"   ⚠️  Failed to move {f.name}: {e}")
@@ -0,0 +1,53 @@
+"""
+Shared DuckDB connection for health-clawkit scripts.
+
+Opening health.duckdb replays the WAL, loads the catalog and takes the file
+lock, so code that logs, imports or summarizes several things in one
+process reuses a single connection instead of reopening the database per
+call. The connection is closed when the process exits.
+"""
+
+import atexit
+from config import get_db_path
+
+_conn = None
+_conn_read_only = False
+
+
+def get_conn(read_only=False):
+    """
+    Get the process-wide connection, opening it on first use.
+
+    DuckDB won't open one file both read-only and read-write in the same
+    process, so there is only ever one connection: a read-write one also
+    serves read-only callers, and asking for read-write while a read-only
+    connection is open reopens it read-write. Callers must not close it.
+
+    Args:
+        read_only: Whether the caller only reads (default: False)
+
+    Returns:
+        duckdb.DuckDBPyConnection: Connection to health.duckdb
+    """
+    global _conn, _conn_read_only
+    if _conn is not None and _conn_read_only and not read_only:
+        close_conn()
+    if _conn is None:
+        # Imported on first use so CLIs like log_nutrition.py --help start
+        # without loading duckdb
+        import duckdb
+
+        _conn = duckdb.connect(str(get_db_path()), read_only=read_only)
+        _conn_read_only = read_only
+    return _conn
+
+
+def close_conn():
+    """Close the shared connection if it is open (also run at exit)."""
+    global _conn
+    if _conn is not None:
+        _conn.close()
+        _conn = None
+
+
+atexit.register(close_conn)
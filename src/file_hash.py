@@ -0,0 +1,32 @@
+"""
+File hashing for import change detection.
+
+The imports table records each CSV's SHA-256 so daily_import.py can tell
+new, changed and unchanged exports apart. The importers hash files they
+are given without one, so standalone imports are recorded the same way.
+"""
+
+import hashlib
+import mmap
+import os
+
+
+def calculate_file_hash(file_path):
+    """
+    Calculate SHA-256 hash of a file.
+    
+    Args:
+        file_path: Path to file
+    
+    Returns:
+        str: Hex digest of file hash
+    """
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # mmap can't map an empty file
+            return hashlib.sha256().hexdigest()
+        
+        # Hash the mapped file in one call: pages come straight from the
+        # page cache, with no read() loop or copy into a Python buffer
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return hashlib.sha256(mm).hexdigest()
@@ -11,24 +11,37 @@ Usage:
     python src/import_cycletracking.py <csv_file>
 """
 
-import duckdb
-import pandas as pd
 import sys
 from pathlib import Path
 from datetime import datetime
-from config import get_db_path
-
-DB_PATH = get_db_path()
-
-
-def import_cycletracking_csv(csv_path, file_hash=None, is_reimport=False):
+from db import get_conn
+from file_hash import calculate_file_hash
+
+# Start looks like "2026-02-05 00:00:00"
+CYCLE_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Encode text values to numbers for storage.
+# This allows querying while preserving the meaning.
+VALUE_MAPPING = {
+    'Unspecified': 0.0,
+    'Light': 1.0,
+    'Medium': 2.0,
+    'Heavy': 3.0,
+    'None': 0.0,
+    'Yes': 1.0,
+    'No': 0.0,
+}
+
+
+def import_cycletracking_csv(csv_path, file_hash=None, is_reimport=False, conn=None):
     """
     Import a CycleTracking CSV into DuckDB readings table.
     
     Args:
         csv_path: Path to CycleTracking CSV file
-        file_hash: SHA-256 hash of the file (for change detection)
+        file_hash: SHA-256 hash of the file (for change detection; computed if None)
         is_reimport: True if re-importing a changed file
+        conn: Open DuckDB connection to use (default: the shared db.get_conn() connection)
     
     Returns:
         int: Number of rows imported, or -1 on error
@@ -39,7 +52,8 @@ def import_cycletracking_csv(csv_path, file_hash=None, is_reimport=False):
         return -1
 
     filename = csv_path.name
-    conn = duckdb.connect(str(DB_PATH))
+    if conn is None:
+        conn = get_conn()
 
     try:
         # Check if already imported
@@ -50,6 +64,15 @@ def import_cycletracking_csv(csv_path, file_hash=None, is_reimport=False):
             print(f"⏭️  Already imported: {filename} (import_id={existing[0]})")
             return 0
 
+        # Hash standalone imports too, so daily_import later sees the file as
+        # unchanged; reading it first also warms the page cache for read_csv
+        if file_hash is None:
+            file_hash = calculate_file_hash(csv_path)
+
+        # pandas is only needed here; importing it lazily keeps it (~0.3 s)
+        # off the startup path of daily_import.py and the other CLIs
+        import pandas as pd
+
         print(f"📖 Reading: {filename}")
         df = pd.read_csv(csv_path)
 
@@ -61,7 +84,7 @@ def import_cycletracking_csv(csv_path, file_hash=None, is_reimport=False):
             return -1
 
         # Convert Start to datetime
-        df['Start'] = pd.to_datetime(df['Start'], errors='coerce')
+        df['Start'] = pd.to_datetime(df['Start'], format=CYCLE_TIMESTAMP_FORMAT, errors='coerce')
         
         # Drop rows with invalid timestamps or missing data
         df = df.dropna(subset=['Start', 'Data', 'Value'])
@@ -71,70 +94,45 @@ def import_cycletracking_csv(csv_path, file_hash=None, is_reimport=False):
         # Transform to readings format
         # Metric name format: "Cycle Tracking - {Data}"
         # e.g., "Cycle Tracking - Menstrual Flow"
-        records = []
-        for _, row in df.iterrows():
-            metric_name = f"Cycle Tracking - {row['Data']}"
-            
-            # Store the value as-is (might be text like "Unspecified", "Light", etc.)
-            # For numeric compatibility, we'll encode text values
-            value_str = str(row['Value'])
-            
-            # Try to convert to numeric, otherwise encode common values
-            try:
-                numeric_value = float(value_str)
-            except ValueError:
-                # Encode text values to numbers for storage
-                # This allows querying while preserving the meaning
-                value_mapping = {
-                    'Unspecified': 0.0,
-                    'Light': 1.0,
-                    'Medium': 2.0,
-                    'Heavy': 3.0,
-                    'None': 0.0,
-                    'Yes': 1.0,
-                    'No': 0.0,
-                }
-                numeric_value = value_mapping.get(value_str, 0.0)
-            
-            records.append({
-                'timestamp': row['Start'],
-                'metric': metric_name,
-                'value': numeric_value,
-                'unit': value_str,  # Store original value in unit field for reference
-                'source': 'cycletracking'
-            })
-
-        df_insert = pd.DataFrame(records)
+        # Store the value as-is in unit (might be text like "Unspecified",
+        # "Light", etc.); value is the number, or the encoded text value
+        # (unknown text becomes 0.0)
+        value_str = df['Value'].astype(str)
+        numeric_value = pd.to_numeric(value_str, errors='coerce')
+        df_insert = pd.DataFrame({
+            'timestamp': df['Start'],
+            'metric': 'Cycle Tracking - ' + df['Data'].astype(str),
+            'value': numeric_value.fillna(value_str.map(VALUE_MAPPING)).fillna(0.0),
+            'unit': value_str,  # Store original value in unit field for reference
+            'source': 'cycletracking'
+        })
         
-        # Insert into readings table
-        rows_before = conn.execute("SELECT COUNT(*) FROM readings").fetchone()[0]
-
-        conn.execute("""
-            INSERT OR IGNORE INTO readings (timestamp, metric, value, unit, source)
-            SELECT timestamp, metric, value, unit, source
-            FROM df_insert
-        """)
-
-        rows_after = conn.execute("SELECT COUNT(*) FROM readings").fetchone()[0]
-        rows_added = rows_after - rows_before
-
-        # Log import (insert or update depending on whether this is a re-import)
-        if is_reimport and existing:
-            conn.execute("""
-                UPDATE imports 
-                SET imported_at = ?, rows_added = ?, file_hash = ?
-                WHERE filename = ?
-            """, [datetime.now(), rows_added, file_hash, filename])
-            import_id = existing[0]
+        # Insert into readings table (returns the number of rows actually
+        # inserted). The frame is registered by name rather than found by
+        # DuckDB scanning this function's locals.
+        conn.register('df_insert', df_insert)
+        try:
+            rows_added = conn.execute("""
+                INSERT OR IGNORE INTO readings (timestamp, metric, value, unit, source)
+                SELECT timestamp, metric, value, unit, source
+                FROM df_insert
+            """).fetchone()[0]
+        finally:
+            conn.unregister('df_insert')
+
+        # Log import (a re-import updates the existing row in place)
+        import_id = conn.execute("""
+            INSERT INTO imports (filename, imported_at, rows_added, source, file_hash)
+            VALUES (?, ?, ?, 'cycletracking', ?)
+            ON CONFLICT (filename) DO UPDATE SET
+                imported_at = EXCLUDED.imported_at,
+                rows_added = EXCLUDED.rows_added,
+                file_hash = EXCLUDED.file_hash
+            RETURNING import_id
+        """, [filename, datetime.now(), rows_added, file_hash]).fetchone()[0]
+        if existing:
             print(f"✅ Re-imported {rows_added} cycle tracking readings (import_id={import_id}, updated hash)")
         else:
-            conn.execute("""
-                INSERT INTO imports (filename, imported_at, rows_added, source, file_hash)
-                VALUES (?, ?, ?, 'cycletracking', ?)
-            """, [filename, datetime.now(), rows_added, file_hash])
-            import_id = conn.execute(
-                "SELECT import_id FROM imports WHERE filename = ?", [filename]
-            ).fetchone()[0]
             print(f"✅ Imported {rows_added} cycle tracking readings (import_id={import_id})")
         
         # Show sample of what was imported
@@ -160,8 +158,6 @@ def import_cycletracking_csv(csv_path, file_hash=None, is_reimport=False):
         import traceback
         traceback.print_exc()
         return -1
-    finally:
-        conn.close()
 
 
 if __name__ == "__main__":
@@ -10,16 +10,18 @@ Usage:
     python src/import_healthkit.py "path/to/HealthMetrics-2026-02-05.csv"
 """
 
-import duckdb
-import pandas as pd
 import sys
 import re
 from pathlib import Path
 from datetime import datetime
-from config import get_db_path
+from db import get_conn
+from file_hash import calculate_file_hash
 
-# Database location
-DB_PATH = get_db_path()
+# Pattern: anything followed by (unit)
+METRIC_COLUMN_RE = re.compile(r'^(.+?)\s*\(([^)]+)\)$')
+
+# Date/Time looks like "2026-02-05 00:00:00"
+HEALTHKIT_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 def parse_metric_column(column_name):
     """
@@ -33,23 +35,23 @@ def parse_metric_column(column_name):
     Returns:
         tuple: (metric_name, unit) or (column_name, "") if no unit found
     """
-    # Pattern: anything followed by (unit)
-    match = re.match(r'^(.+?)\s*\(([^)]+)\)$', column_name)
+    match = METRIC_COLUMN_RE.match(column_name)
     if match:
         metric = match.group(1).strip()
         unit = match.group(2).strip()
         return metric, unit
     return column_name, ""
 
-def import_csv(csv_path, file_hash=None, is_reimport=False, source="healthkit"):
+def import_csv(csv_path, file_hash=None, is_reimport=False, source="healthkit", conn=None):
     """
     Import a Health Auto Export CSV into DuckDB.
     
     Args:
         csv_path: Path to CSV file
-        file_hash: SHA-256 hash of the file (for change detection)
+        file_hash: SHA-256 hash of the file (for change detection; computed if None)
         is_reimport: True if re-importing a changed file
         source: Data source identifier (default: "healthkit")
+        conn: Open DuckDB connection to use (default: the shared db.get_conn() connection)
     
     Returns:
         int: Number of rows imported, or -1 on error
@@ -62,8 +64,9 @@ def import_csv(csv_path, file_hash=None, is_reimport=False, source="healthkit"):
     
     filename = csv_path.name
     
-    # Connect to database
-    conn = duckdb.connect(str(DB_PATH))
+    # Connect to database unless the caller passed a connection
+    if conn is None:
+        conn = get_conn()
     
     try:
         # Check if already imported
@@ -76,85 +79,98 @@ def import_csv(csv_path, file_hash=None, is_reimport=False, source="healthkit"):
             print(f"⏭️  Already imported: {filename} (import_id={existing[0]})")
             return 0
         
-        # Read CSV
+        # Hash standalone imports too, so daily_import later sees the file as
+        # unchanged; reading it first also warms the page cache for read_csv
+        if file_hash is None:
+            file_hash = calculate_file_hash(csv_path)
+        
+        # Read CSV with DuckDB's parser (no pandas round trip).
+        # line_no keeps file order so duplicates can keep the first occurrence.
         print(f"📖 Reading: {csv_path.name}")
-        df = pd.read_csv(csv_path)
+        conn.execute("""
+            CREATE OR REPLACE TEMP TABLE healthkit_raw AS
+            SELECT row_number() OVER () as line_no, *
+            FROM read_csv(?, header=true, all_varchar=true)
+        """, [str(csv_path)])
         
         # Verify Date/Time column exists
-        if 'Date/Time' not in df.columns:
+        header = [row[0] for row in conn.execute("DESCRIBE healthkit_raw").fetchall()]
+        if 'Date/Time' not in header:
             print(f"❌ Missing 'Date/Time' column in {filename}")
             return -1
         
-        # Convert Date/Time to datetime
-        df['Date/Time'] = pd.to_datetime(df['Date/Time'])
-        
-        # Extract metric columns (everything except Date/Time)
-        metric_columns = [col for col in df.columns if col != 'Date/Time']
-        
-        print(f"📊 Found {len(df)} rows, {len(metric_columns)} metric columns")
-        
-        # Melt wide → long format
-        df_long = df.melt(
-            id_vars=['Date/Time'],
-            value_vars=metric_columns,
-            var_name='metric_raw',
-            value_name='value'
-        )
-        
-        # Drop NaN values (sparse data)
-        df_long = df_long.dropna(subset=['value'])
-        
-        print(f"🔄 Transformed to {len(df_long)} non-empty readings")
-        
-        # Parse metric names and units
-        df_long[['metric', 'unit']] = df_long['metric_raw'].apply(
-            lambda x: pd.Series(parse_metric_column(x))
-        )
-        
-        # Prepare final dataframe
-        df_final = df_long[['Date/Time', 'metric', 'value', 'unit']].copy()
-        df_final.rename(columns={'Date/Time': 'timestamp'}, inplace=True)
-        df_final['source'] = source
-        
-        # Remove duplicates (keep first occurrence)
-        initial_count = len(df_final)
-        df_final = df_final.drop_duplicates(subset=['timestamp', 'metric', 'source'], keep='first')
-        dupe_count = initial_count - len(df_final)
+        # Metric columns are everything except line_no and Date/Time
+        metric_columns = [col for col in header if col not in ('line_no', 'Date/Time')]
+        row_count = conn.execute("SELECT COUNT(*) FROM healthkit_raw").fetchone()[0]
+        print(f"📊 Found {row_count} rows, {len(metric_columns)} metric columns")
+        
+        # Parse metric names and units once per column header, not per reading
+        parsed = [parse_metric_column(col) for col in metric_columns]
+        
+        # Unpivot wide → long (empty cells are NULL and dropped by UNPIVOT)
+        # and attach each header's metric name and unit
+        conn.execute(f"""
+            CREATE OR REPLACE TEMP TABLE healthkit_long AS
+            SELECT
+                line_no,
+                strptime("Date/Time", '{HEALTHKIT_TIMESTAMP_FORMAT}') as timestamp,
+                headers.metric,
+                CAST(value AS DOUBLE) as value,
+                headers.unit
+            FROM (
+                UNPIVOT healthkit_raw
+                ON COLUMNS(* EXCLUDE (line_no, "Date/Time"))
+                INTO NAME metric_raw VALUE value
+            ) unpivoted
+            JOIN (
+                SELECT
+                    unnest(?) as metric_raw,
+                    unnest(?) as metric,
+                    unnest(?) as unit
+            ) headers USING (metric_raw)
+        """, [
+            metric_columns,
+            [metric for metric, _ in parsed],
+            [unit for _, unit in parsed],
+        ])
+        
+        long_count, unique_count = conn.execute("""
+            SELECT COUNT(*), COUNT(DISTINCT (timestamp, metric))
+            FROM healthkit_long
+        """).fetchone()
+        print(f"🔄 Transformed to {long_count} non-empty readings")
+        
+        # Duplicates are removed on insert (keep first occurrence)
+        dupe_count = long_count - unique_count
         
         if dupe_count > 0:
             print(f"⚠️  Removed {dupe_count} duplicate readings")
         
         # Insert into database (ignore conflicts for idempotency)
-        rows_before = conn.execute("SELECT COUNT(*) FROM readings").fetchone()[0]
-        
-        # Use INSERT OR IGNORE to handle conflicts gracefully
-        conn.execute("""
+        # Use INSERT OR IGNORE to handle conflicts gracefully; the statement
+        # returns the number of rows actually inserted
+        rows_added = conn.execute("""
             INSERT OR IGNORE INTO readings (timestamp, metric, value, unit, source)
-            SELECT timestamp, metric, value, unit, source
-            FROM df_final
-        """)
-        
-        rows_after = conn.execute("SELECT COUNT(*) FROM readings").fetchone()[0]
-        rows_added = rows_after - rows_before
-        
-        # Log import (insert or update depending on whether this is a re-import)
-        if is_reimport and existing:
-            conn.execute("""
-                UPDATE imports 
-                SET imported_at = ?, rows_added = ?, file_hash = ?
-                WHERE filename = ?
-            """, [datetime.now(), rows_added, file_hash, filename])
-            import_id = existing[0]
+            SELECT DISTINCT ON (timestamp, metric) timestamp, metric, value, unit, ?
+            FROM healthkit_long
+            ORDER BY timestamp, metric, line_no
+        """, [source]).fetchone()[0]
+        conn.execute("DROP TABLE healthkit_raw")
+        conn.execute("DROP TABLE healthkit_long")
+        
+        # Log import (a re-import updates the existing row in place)
+        import_id = conn.execute("""
+            INSERT INTO imports (filename, imported_at, rows_added, source, file_hash)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (filename) DO UPDATE SET
+                imported_at = EXCLUDED.imported_at,
+                rows_added = EXCLUDED.rows_added,
+                file_hash = EXCLUDED.file_hash
+            RETURNING import_id
+        """, [filename, datetime.now(), rows_added, source, file_hash]).fetchone()[0]
+        if existing:
             print(f"✅ Re-imported {rows_added} new readings (import_id={import_id}, updated hash)")
         else:
-            conn.execute("""
-                INSERT INTO imports (filename, imported_at, rows_added, source, file_hash)
-                VALUES (?, ?, ?, ?, ?)
-            """, [filename, datetime.now(), rows_added, source, file_hash])
-            import_id = conn.execute(
-                "SELECT import_id FROM imports WHERE filename = ?",
-                [filename]
-            ).fetchone()[0]
             print(f"✅ Imported {rows_added} new readings (import_id={import_id})")
         
         # Show sample metrics imported
@@ -179,9 +195,7 @@ def import_csv(csv_path, file_hash=None, is_reimport=False, source="healthkit"):
         import traceback
         traceback.print_exc()
         return -1
-    
-    finally:
-        conn.close()
+
 
 def main():
     if len(sys.argv) < 2:
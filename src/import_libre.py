@@ -21,21 +21,22 @@ Usage:
 import argparse
 import sys
 from pathlib import Path
-from datetime import datetime
 import duckdb
 
 from config import get_db_path
 
 
-def parse_libre_timestamp(ts_str: str) -> datetime:
-    """Parse LibreView timestamp format: MM-DD-YYYY HH:MM"""
-    return datetime.strptime(ts_str, "%m-%d-%Y %H:%M")
+# LibreView timestamp format: MM-DD-YYYY HH:MM
+LIBRE_TIMESTAMP_FORMAT = "%m-%d-%Y %H:%M"
 
 
 def import_libre_csv(csv_path: Path, dry_run: bool = False) -> dict:
     """
     Import LibreView glucose CSV into DuckDB.
     
+    The file is parsed, filtered and inserted by DuckDB's CSV reader in
+    bulk rather than line by line in Python.
+    
     Returns dict with import statistics.
     """
     if not csv_path.exists():
@@ -45,136 +46,107 @@ def import_libre_csv(csv_path: Path, dry_run: bool = False) -> dict:
     db_path = get_db_path()
     conn = duckdb.connect(str(db_path))
     
-    # Check if already imported
-    existing = conn.execute(
-        "SELECT import_id FROM imports WHERE filename = ?",
-        [filename]
-    ).fetchone()
-    
-    if existing:
-        print(f"⏭️  Already imported: {filename}")
-        conn.close()
-        return {"status": "skipped", "reason": "already_imported"}
-    
-    # Read CSV, skip first metadata row
-    print(f"📖 Reading {csv_path}...")
-    
-    with open(csv_path, 'r') as f:
-        lines = f.readlines()
-    
-    # Parse header (row 2, index 1)
-    header = lines[1].strip().split(',')
-    col_idx = {name: i for i, name in enumerate(header)}
-    
-    timestamp_col = col_idx.get('Device Timestamp')
-    record_type_col = col_idx.get('Record Type')
-    historic_glucose_col = col_idx.get('Historic Glucose mg/dL')
-    scan_glucose_col = col_idx.get('Scan Glucose mg/dL')
-    device_col = col_idx.get('Device')
-    
-    if timestamp_col is None or record_type_col is None:
-        raise ValueError(f"Missing required columns. Found: {header}")
-    
-    # Parse data rows
-    readings = []
-    skipped = 0
-    errors = 0
-    
-    for i, line in enumerate(lines[2:], start=3):
-        try:
-            cols = line.strip().split(',')
-            
-            if len(cols) < max(timestamp_col, record_type_col, 
-                              historic_glucose_col or 0, scan_glucose_col or 0) + 1:
-                skipped += 1
-                continue
-            
-            record_type = cols[record_type_col].strip()
-            
-            # Only import glucose readings (type 0 = historic, type 1 = scan)
-            if record_type not in ('0', '1'):
-                skipped += 1
-                continue
-            
-            timestamp_str = cols[timestamp_col].strip()
-            if not timestamp_str:
-                skipped += 1
-                continue
-            
-            timestamp = parse_libre_timestamp(timestamp_str)
-            
-            if record_type == '0':
-                glucose_val = cols[historic_glucose_col].strip() if historic_glucose_col else ''
-                metric = "Glucose (Historic)"
-            else:
-                glucose_val = cols[scan_glucose_col].strip() if scan_glucose_col else ''
-                metric = "Glucose (Scan)"
-            
-            if not glucose_val:
-                skipped += 1
-                continue
-            
-            try:
-                value = float(glucose_val)
-            except ValueError:
-                skipped += 1
-                continue
-            
-            readings.append({
-                'timestamp': timestamp,
-                'metric': metric,
-                'value': value,
-                'unit': 'mg/dL',
-                'source': 'libre',
-            })
-            
-        except Exception as e:
-            errors += 1
-            if errors <= 5:
-                print(f"⚠️  Row {i}: {e}")
-    
-    print(f"📊 Parsed {len(readings):,} glucose readings ({skipped:,} skipped, {errors} errors)")
-    
-    if dry_run:
-        print("🏃 Dry run — no changes made")
+    try:
+        # Check if already imported
+        existing = conn.execute(
+            "SELECT import_id FROM imports WHERE filename = ?",
+            [filename]
+        ).fetchone()
+        
+        if existing:
+            print(f"⏭️  Already imported: {filename}")
+            return {"status": "skipped", "reason": "already_imported"}
+        
+        # Read CSV, skip first metadata row (row 2 is the header).
+        # line_no matches the file's line numbers for error messages.
+        print(f"📖 Reading {csv_path}...")
+        conn.execute("""
+            CREATE TEMP TABLE libre_raw AS
+            SELECT row_number() OVER () + 2 as line_no, *
+            FROM read_csv(?, skip=1, header=true, all_varchar=true, null_padding=true)
+        """, [str(csv_path)])
+        
+        header = [row[0] for row in conn.execute("DESCRIBE libre_raw").fetchall()]
+        if 'Device Timestamp' not in header or 'Record Type' not in header:
+            raise ValueError(f"Missing required columns. Found: {header[1:]}")
+        
+        # Glucose columns are optional; a missing one yields no readings of that type
+        historic_col = '"Historic Glucose mg/dL"' if 'Historic Glucose mg/dL' in header else 'NULL'
+        scan_col = '"Scan Glucose mg/dL"' if 'Scan Glucose mg/dL' in header else 'NULL'
+        
+        # Only glucose records (type 0 = historic, type 1 = scan) with a timestamp.
+        # timestamp is NULL when it fails to parse; value when it is empty or not numeric.
+        conn.execute(f"""
+            CREATE TEMP TABLE libre_glucose AS
+            SELECT
+                line_no,
+                trim("Device Timestamp") as timestamp_str,
+                try_strptime(trim("Device Timestamp"), '{LIBRE_TIMESTAMP_FORMAT}') as timestamp,
+                CASE WHEN trim("Record Type") = '0'
+                     THEN 'Glucose (Historic)' ELSE 'Glucose (Scan)' END as metric,
+                TRY_CAST(trim(CASE WHEN trim("Record Type") = '0'
+                                   THEN {historic_col} ELSE {scan_col} END) AS DOUBLE) as value
+            FROM libre_raw
+            WHERE trim("Record Type") IN ('0', '1')
+            AND NULLIF(trim("Device Timestamp"), '') IS NOT NULL
+        """)
+        
+        total_rows = conn.execute("SELECT COUNT(*) FROM libre_raw").fetchone()[0]
+        parsed, errors = conn.execute("""
+            SELECT
+                COUNT(*) FILTER (WHERE timestamp IS NOT NULL AND value IS NOT NULL),
+                COUNT(*) FILTER (WHERE timestamp IS NULL)
+            FROM libre_glucose
+        """).fetchone()
+        skipped = total_rows - parsed - errors
+        
+        bad_rows = conn.execute("""
+            SELECT line_no, timestamp_str
+            FROM libre_glucose
+            WHERE timestamp IS NULL
+            ORDER BY line_no
+            LIMIT 5
+        """).fetchall()
+        for line_no, timestamp_str in bad_rows:
+            print(f"⚠️  Row {line_no}: time data '{timestamp_str}' does not match format '{LIBRE_TIMESTAMP_FORMAT}'")
+        
+        print(f"📊 Parsed {parsed:,} glucose readings ({skipped:,} skipped, {errors} errors)")
+        
+        if dry_run:
+            print("🏃 Dry run — no changes made")
+            return {
+                "status": "dry_run",
+                "readings_parsed": parsed,
+                "skipped": skipped,
+                "errors": errors
+            }
+        
+        # Insert readings in one statement (with deduplication)
+        inserted = conn.execute("""
+            INSERT INTO readings (timestamp, metric, value, unit, source)
+            SELECT timestamp, metric, value, 'mg/dL', 'libre'
+            FROM libre_glucose
+            WHERE timestamp IS NOT NULL AND value IS NOT NULL
+            ON CONFLICT (timestamp, metric, source) DO NOTHING
+        """).fetchone()[0]
+        duplicates = parsed - inserted
+        
+        # Log the import
+        conn.execute("""
+            INSERT INTO imports (filename, imported_at, rows_added, source)
+            VALUES (?, CURRENT_TIMESTAMP, ?, 'libre')
+        """, [filename, inserted])
+        
+        conn.commit()
+    finally:
         conn.close()
-        return {
-            "status": "dry_run",
-            "readings_parsed": len(readings),
-            "skipped": skipped,
-            "errors": errors
-        }
-    
-    # Insert readings (with deduplication)
-    inserted = 0
-    duplicates = 0
-    
-    for r in readings:
-        try:
-            conn.execute("""
-                INSERT INTO readings (timestamp, metric, value, unit, source)
-                VALUES (?, ?, ?, ?, ?)
-                ON CONFLICT (timestamp, metric, source) DO NOTHING
-            """, [r['timestamp'], r['metric'], r['value'], r['unit'], r['source']])
-            inserted += 1
-        except duckdb.ConstraintException:
-            duplicates += 1
-    
-    # Log the import
-    conn.execute("""
-        INSERT INTO imports (filename, imported_at, rows_added, source)
-        VALUES (?, CURRENT_TIMESTAMP, ?, 'libre')
-    """, [filename, inserted])
-    
-    conn.commit()
-    conn.close()
     
     print(f"✅ Imported {inserted:,} readings from {filename}")
     
     return {
         "status": "success",
         "filename": filename,
-        "readings_parsed": len(readings),
+        "readings_parsed": parsed,
         "inserted": inserted,
         "duplicates": duplicates,
         "skipped": skipped,
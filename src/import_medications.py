@@ -6,24 +6,25 @@ Usage:
     python src/import_medications.py <csv_file>
 """
 
-import duckdb
-import pandas as pd
 import sys
 from pathlib import Path
 from datetime import datetime
-from config import get_db_path
+from db import get_conn
+from file_hash import calculate_file_hash
 
-DB_PATH = get_db_path()
+# Dates look like "2026-02-06 22:19:17 -0800"
+MEDICATION_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S %z"
 
 
-def import_medications_csv(csv_path, file_hash=None, is_reimport=False):
+def import_medications_csv(csv_path, file_hash=None, is_reimport=False, conn=None):
     """
     Import a Medications CSV into DuckDB.
 
     Args:
         csv_path: Path to CSV file
-        file_hash: SHA-256 hash of the file (for change detection)
+        file_hash: SHA-256 hash of the file (for change detection; computed if None)
         is_reimport: True if re-importing a changed file
+        conn: Open DuckDB connection to use (default: the shared db.get_conn() connection)
 
     Returns:
         int: Number of rows imported, or -1 on error
@@ -34,7 +35,8 @@ def import_medications_csv(csv_path, file_hash=None, is_reimport=False):
         return -1
 
     filename = csv_path.name
-    conn = duckdb.connect(str(DB_PATH))
+    if conn is None:
+        conn = get_conn()
 
     try:
         # Check if already imported
@@ -45,64 +47,69 @@ def import_medications_csv(csv_path, file_hash=None, is_reimport=False):
             print(f"⏭️  Already imported: {filename} (import_id={existing[0]})")
             return 0
 
+        # Hash standalone imports too, so daily_import later sees the file as
+        # unchanged; reading it first also warms the page cache for read_csv
+        if file_hash is None:
+            file_hash = calculate_file_hash(csv_path)
+
         print(f"📖 Reading: {filename}")
-        df = pd.read_csv(csv_path)
+        conn.execute("""
+            CREATE OR REPLACE TEMP TABLE medications_raw AS
+            SELECT * FROM read_csv(?, header=true, all_varchar=true)
+        """, [str(csv_path)])
 
-        if "Date" not in df.columns:
+        header = [row[0] for row in conn.execute("DESCRIBE medications_raw").fetchall()]
+        if "Date" not in header:
             print(f"❌ Missing 'Date' column in {filename}")
             return -1
 
-        # Skip archived
-        if "Archived" in df.columns:
-            df = df[df["Archived"] != "Yes"]
-
-        # Parse dates (format: "2026-02-06 22:19:17 -0800")
-        df["timestamp"] = pd.to_datetime(df["Date"], utc=True)
-        df["scheduled_at"] = pd.to_datetime(df.get("Scheduled Date"), utc=True, errors="coerce")
-
-        # Build insert df
-        df_insert = pd.DataFrame({
-            "timestamp": df["timestamp"],
-            "scheduled_at": df["scheduled_at"],
-            "medication": df["Medication"],
-            "dosage": pd.to_numeric(df.get("Dosage"), errors="coerce"),
-            "scheduled_dosage": pd.to_numeric(df.get("Scheduled Dosage"), errors="coerce"),
-            "unit": df.get("Unit", ""),
-            "status": df.get("Status", ""),
-        })
-
-        df_insert = df_insert.dropna(subset=["timestamp", "medication"])
-
-        print(f"💊 Found {len(df_insert)} medication records")
+        # Optional columns fall back to a constant when the export lacks them
+        def column_or(name, default="NULL"):
+            return f'"{name}"' if name in header else default
+
+        # Skip archived; unparseable scheduled dates and dosages become NULL
+        archived = column_or("Archived")
+        conn.execute(f"""
+            CREATE OR REPLACE TEMP TABLE medications_insert AS
+            SELECT
+                CAST(strptime("Date", '{MEDICATION_TIMESTAMP_FORMAT}') AS TIMESTAMP) as timestamp,
+                CAST(try_strptime({column_or("Scheduled Date")}, '{MEDICATION_TIMESTAMP_FORMAT}') AS TIMESTAMP) as scheduled_at,
+                "Medication" as medication,
+                TRY_CAST({column_or("Dosage")} AS DOUBLE) as dosage,
+                TRY_CAST({column_or("Scheduled Dosage")} AS DOUBLE) as scheduled_dosage,
+                {column_or("Unit", "''")} as unit,
+                {column_or("Status", "''")} as status
+            FROM medications_raw
+            WHERE {archived} IS DISTINCT FROM 'Yes'
+            AND "Date" IS NOT NULL
+            AND "Medication" IS NOT NULL
+        """)
 
-        rows_before = conn.execute("SELECT COUNT(*) FROM medications").fetchone()[0]
+        record_count = conn.execute("SELECT COUNT(*) FROM medications_insert").fetchone()[0]
+        print(f"💊 Found {record_count} medication records")
 
-        conn.execute("""
+        # INSERT returns the number of rows actually inserted
+        rows_added = conn.execute("""
             INSERT OR IGNORE INTO medications (timestamp, scheduled_at, medication, dosage, scheduled_dosage, unit, status)
             SELECT timestamp, scheduled_at, medication, dosage, scheduled_dosage, unit, status
-            FROM df_insert
-        """)
-
-        rows_after = conn.execute("SELECT COUNT(*) FROM medications").fetchone()[0]
-        rows_added = rows_after - rows_before
-
-        # Log import (insert or update depending on whether this is a re-import)
-        if is_reimport and existing:
-            conn.execute("""
-                UPDATE imports 
-                SET imported_at = ?, rows_added = ?, file_hash = ?
-                WHERE filename = ?
-            """, [datetime.now(), rows_added, file_hash, filename])
-            import_id = existing[0]
+            FROM medications_insert
+        """).fetchone()[0]
+        conn.execute("DROP TABLE medications_raw")
+        conn.execute("DROP TABLE medications_insert")
+
+        # Log import (a re-import updates the existing row in place)
+        import_id = conn.execute("""
+            INSERT INTO imports (filename, imported_at, rows_added, source, file_hash)
+            VALUES (?, ?, ?, 'medications', ?)
+            ON CONFLICT (filename) DO UPDATE SET
+                imported_at = EXCLUDED.imported_at,
+                rows_added = EXCLUDED.rows_added,
+                file_hash = EXCLUDED.file_hash
+            RETURNING import_id
+        """, [filename, datetime.now(), rows_added, file_hash]).fetchone()[0]
+        if existing:
             print(f"✅ Re-imported {rows_added} medication records (import_id={import_id}, updated hash)")
         else:
-            conn.execute("""
-                INSERT INTO imports (filename, imported_at, rows_added, source, file_hash)
-                VALUES (?, ?, ?, 'medications', ?)
-            """, [filename, datetime.now(), rows_added, file_hash])
-            import_id = conn.execute(
-                "SELECT import_id FROM imports WHERE filename = ?", [filename]
-            ).fetchone()[0]
             print(f"✅ Imported {rows_added} medication records (import_id={import_id})")
         
         return rows_added
@@ -112,8 +119,6 @@ def import_medications_csv(csv_path, file_hash=None, is_reimport=False):
         import traceback
         traceback.print_exc()
         return -1
-    finally:
-        conn.close()
 
 
 if __name__ == "__main__":
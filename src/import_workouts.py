@@ -6,55 +6,44 @@ Usage:
     python src/import_workouts.py <csv_file>
 """
 
-import duckdb
-import pandas as pd
 import sys
 from pathlib import Path
 from datetime import datetime
-from config import get_db_path
+from db import get_conn
+from file_hash import calculate_file_hash
 
-DB_PATH = get_db_path()
+# Start/End look like "2026-02-05 07:00:00", optionally with a UTC offset
+WORKOUT_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 
-def parse_duration(dur_str):
-    """Parse 'HH:MM:SS' to seconds."""
-    if not dur_str or pd.isna(dur_str):
-        return None
-    try:
-        parts = str(dur_str).split(":")
-        if len(parts) == 3:
-            return int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
-        if len(parts) == 2:
-            return int(parts[0]) * 60 + int(parts[1])
-    except (ValueError, TypeError):
-        pass
-    return None
-
-
-def safe_float(val):
-    """Convert to float or None."""
-    try:
-        if pd.isna(val) or val == "":
-            return None
-        return float(val)
-    except (ValueError, TypeError):
-        return None
+def timestamp_sql(column):
+    """SQL expression parsing a Start/End column (NULL if invalid)."""
+    return f"""COALESCE(
+        CAST(try_strptime({column}, '{WORKOUT_TIMESTAMP_FORMAT} %z') AS TIMESTAMP),
+        try_strptime({column}, '{WORKOUT_TIMESTAMP_FORMAT}')
+    )"""
 
 
-def safe_int(val):
-    """Convert to int or None."""
-    f = safe_float(val)
-    return int(f) if f is not None else None
+def duration_sql(column):
+    """SQL expression parsing 'HH:MM:SS' (or 'MM:SS') to seconds (NULL if invalid)."""
+    parts = f"string_split(trim({column}), ':')"
+    return f"""CASE
+        WHEN regexp_full_match(trim({column}), '[0-9]+:[0-9]+:[0-9]+')
+            THEN CAST({parts}[1] AS BIGINT) * 3600 + CAST({parts}[2] AS BIGINT) * 60 + CAST({parts}[3] AS BIGINT)
+        WHEN regexp_full_match(trim({column}), '[0-9]+:[0-9]+')
+            THEN CAST({parts}[1] AS BIGINT) * 60 + CAST({parts}[2] AS BIGINT)
+    END"""
 
 
-def import_workouts_csv(csv_path, file_hash=None, is_reimport=False):
+def import_workouts_csv(csv_path, file_hash=None, is_reimport=False, conn=None):
     """
     Import a Workouts CSV into DuckDB.
 
     Args:
         csv_path: Path to CSV file
-        file_hash: SHA-256 hash of the file (for change detection)
+        file_hash: SHA-256 hash of the file (for change detection; computed if None)
         is_reimport: True if re-importing a changed file
+        conn: Open DuckDB connection to use (default: the shared db.get_conn() connection)
 
     Returns:
         int: Number of rows imported, or -1 on error
@@ -65,9 +54,18 @@ def import_workouts_csv(csv_path, file_hash=None, is_reimport=False):
         return -1
 
     filename = csv_path.name
-    conn = duckdb.connect(str(DB_PATH))
+    own_conn = conn is None
+    if own_conn:
+        # Standalone run: write the workouts and the imports log in one
+        # transaction, on a cursor of its own so an early return can't leave
+        # the shared connection mid-transaction. A passed-in connection's
+        # caller manages its own.
+        conn = get_conn().cursor()
 
     try:
+        if own_conn:
+            conn.begin()
+
         existing = conn.execute(
             "SELECT import_id, file_hash FROM imports WHERE filename = ?", [filename]
         ).fetchone()
@@ -75,66 +73,78 @@ def import_workouts_csv(csv_path, file_hash=None, is_reimport=False):
             print(f"⏭️  Already imported: {filename} (import_id={existing[0]})")
             return 0
 
-        print(f"📖 Reading: {filename}")
-        df = pd.read_csv(csv_path)
+        # Hash standalone imports too, so daily_import later sees the file as
+        # unchanged; reading it first also warms the page cache for read_csv
+        if file_hash is None:
+            file_hash = calculate_file_hash(csv_path)
 
-        if "Type" not in df.columns or "Start" not in df.columns:
+        # Only the header is sniffed here; the SELECT below reads just the
+        # columns it uses (exports carry many more), all as VARCHAR so no
+        # types are inferred, and casts them itself
+        print(f"📖 Reading: {filename}")
+        header = [row[0] for row in conn.execute("""
+            DESCRIBE SELECT * FROM read_csv(?, header=true, all_varchar=true)
+        """, [str(csv_path)]).fetchall()]
+        if "Type" not in header or "Start" not in header:
             print(f"❌ Missing required columns in {filename}")
             return -1
 
-        records = []
-        for _, row in df.iterrows():
-            records.append({
-                "start_time": pd.to_datetime(row.get("Start"), errors="coerce"),
-                "end_time": pd.to_datetime(row.get("End"), errors="coerce"),
-                "type": row["Type"],
-                "duration_seconds": parse_duration(row.get("Duration")),
-                "total_energy_kcal": safe_float(row.get("Total Energy (kcal)")),
-                "active_energy_kcal": safe_float(row.get("Active Energy (kcal)")),
-                "max_heart_rate": safe_float(row.get("Max Heart Rate (bpm)")),
-                "avg_heart_rate": safe_float(row.get("Avg Heart Rate (bpm)")),
-                "distance_km": safe_float(row.get("Distance (km)")),
-                "step_count": safe_int(row.get("Step Count (count)")),
-            })
-
-        df_insert = pd.DataFrame(records)
-        df_insert = df_insert.dropna(subset=["start_time", "type"])
-
-        print(f"🏋️ Found {len(df_insert)} workout records")
-
-        rows_before = conn.execute("SELECT COUNT(*) FROM workouts").fetchone()[0]
-
-        conn.execute("""
+        # Optional columns are NULL when the export lacks them
+        def column(name):
+            return f'"{name}"' if name in header else "NULL"
+
+        # Unparseable dates, durations and numbers become NULL; step_count
+        # is truncated (a DOUBLE → INTEGER cast would round)
+        conn.execute(f"""
+            CREATE OR REPLACE TEMP TABLE workouts_insert AS
+            SELECT * FROM (
+                SELECT
+                    {timestamp_sql('"Start"')} as start_time,
+                    {timestamp_sql(column("End"))} as end_time,
+                    "Type" as type,
+                    {duration_sql(column("Duration"))} as duration_seconds,
+                    TRY_CAST({column("Total Energy (kcal)")} AS DOUBLE) as total_energy_kcal,
+                    TRY_CAST({column("Active Energy (kcal)")} AS DOUBLE) as active_energy_kcal,
+                    TRY_CAST({column("Max Heart Rate (bpm)")} AS DOUBLE) as max_heart_rate,
+                    TRY_CAST({column("Avg Heart Rate (bpm)")} AS DOUBLE) as avg_heart_rate,
+                    TRY_CAST({column("Distance (km)")} AS DOUBLE) as distance_km,
+                    TRUNC(TRY_CAST({column("Step Count (count)")} AS DOUBLE)) as step_count
+                FROM read_csv(?, header=true, all_varchar=true)
+            )
+            WHERE start_time IS NOT NULL AND type IS NOT NULL
+        """, [str(csv_path)])
+
+        record_count = conn.execute("SELECT COUNT(*) FROM workouts_insert").fetchone()[0]
+        print(f"🏋️ Found {record_count} workout records")
+
+        # INSERT returns the number of rows actually inserted
+        rows_added = conn.execute("""
             INSERT OR IGNORE INTO workouts 
                 (start_time, end_time, type, duration_seconds, total_energy_kcal, 
                  active_energy_kcal, max_heart_rate, avg_heart_rate, distance_km, step_count)
             SELECT start_time, end_time, type, duration_seconds, total_energy_kcal,
                    active_energy_kcal, max_heart_rate, avg_heart_rate, distance_km, step_count
-            FROM df_insert
-        """)
-
-        rows_after = conn.execute("SELECT COUNT(*) FROM workouts").fetchone()[0]
-        rows_added = rows_after - rows_before
-
-        # Log import (insert or update depending on whether this is a re-import)
-        if is_reimport and existing:
-            conn.execute("""
-                UPDATE imports 
-                SET imported_at = ?, rows_added = ?, file_hash = ?
-                WHERE filename = ?
-            """, [datetime.now(), rows_added, file_hash, filename])
-            import_id = existing[0]
+            FROM workouts_insert
+        """).fetchone()[0]
+        conn.execute("DROP TABLE workouts_insert")
+
+        # Log import (a re-import updates the existing row in place)
+        import_id = conn.execute("""
+            INSERT INTO imports (filename, imported_at, rows_added, source, file_hash)
+            VALUES (?, ?, ?, 'workouts', ?)
+            ON CONFLICT (filename) DO UPDATE SET
+                imported_at = EXCLUDED.imported_at,
+                rows_added = EXCLUDED.rows_added,
+                file_hash = EXCLUDED.file_hash
+            RETURNING import_id
+        """, [filename, datetime.now(), rows_added, file_hash]).fetchone()[0]
+        if existing:
             print(f"✅ Re-imported {rows_added} workout records (import_id={import_id}, updated hash)")
         else:
-            conn.execute("""
-                INSERT INTO imports (filename, imported_at, rows_added, source, file_hash)
-                VALUES (?, ?, ?, 'workouts', ?)
-            """, [filename, datetime.now(), rows_added, file_hash])
-            import_id = conn.execute(
-                "SELECT import_id FROM imports WHERE filename = ?", [filename]
-            ).fetchone()[0]
             print(f"✅ Imported {rows_added} workout records (import_id={import_id})")
         
+        if own_conn:
+            conn.commit()
         return rows_added
 
     except Exception as e:
@@ -142,8 +152,11 @@ def import_workouts_csv(csv_path, file_hash=None, is_reimport=False):
         import traceback
         traceback.print_exc()
         return -1
+
     finally:
-        conn.close()
+        if own_conn:
+            # Closing rolls back anything not committed (early returns, errors)
+            conn.close()
 
 
 if __name__ == "__main__":
@@ -7,6 +7,8 @@ Creates three tables:
 - metrics: Metadata catalog for known metrics
 - imports: Log of import operations
 
+Plus daily_metric_summary, the per-day rollup the dashboard reads from.
+
 Usage:
     python src/init_db.py
 """
@@ -15,10 +17,95 @@ import duckdb
 import sys
 from pathlib import Path
 from config import get_db_path
+from metric_summary import refresh_daily_metric_summary
 
 # Database location
 DB_PATH = get_db_path()
 
+SCHEMA_SQL = """
+BEGIN TRANSACTION;
+
+-- Create readings table
+CREATE TABLE IF NOT EXISTS readings (
+    timestamp TIMESTAMP NOT NULL,
+    metric VARCHAR NOT NULL,
+    value DOUBLE NOT NULL,
+    unit VARCHAR NOT NULL,
+    source VARCHAR NOT NULL,
+    PRIMARY KEY (timestamp, metric, source)
+);
+
+-- Create indexes for common query patterns
+CREATE INDEX IF NOT EXISTS idx_readings_timestamp ON readings(timestamp);
+CREATE INDEX IF NOT EXISTS idx_readings_metric ON readings(metric);
+
+-- Create metrics metadata table
+CREATE SEQUENCE IF NOT EXISTS seq_metrics START 1;
+CREATE TABLE IF NOT EXISTS metrics (
+    metric_id INTEGER PRIMARY KEY DEFAULT nextval('seq_metrics'),
+    name VARCHAR UNIQUE NOT NULL,
+    display_name VARCHAR,
+    category VARCHAR,
+    unit VARCHAR,
+    description VARCHAR
+);
+
+-- Create imports log table (file_hash/file_size/file_mtime_ns are
+-- also added to older databases by the migrate_add_* scripts)
+CREATE SEQUENCE IF NOT EXISTS seq_imports START 1;
+CREATE TABLE IF NOT EXISTS imports (
+    import_id INTEGER PRIMARY KEY DEFAULT nextval('seq_imports'),
+    filename VARCHAR UNIQUE NOT NULL,
+    imported_at TIMESTAMP NOT NULL,
+    rows_added INTEGER NOT NULL,
+    source VARCHAR NOT NULL,
+    file_hash VARCHAR,
+    file_size BIGINT,
+    file_mtime_ns BIGINT
+);
+
+-- Create medications table
+CREATE SEQUENCE IF NOT EXISTS seq_medications START 1;
+CREATE TABLE IF NOT EXISTS medications (
+    id INTEGER PRIMARY KEY DEFAULT nextval('seq_medications'),
+    timestamp TIMESTAMP NOT NULL,
+    scheduled_at TIMESTAMP,
+    medication VARCHAR NOT NULL,
+    dosage DOUBLE,
+    scheduled_dosage DOUBLE,
+    unit VARCHAR,
+    status VARCHAR,
+    UNIQUE(timestamp, medication)
+);
+
+-- Create index for medications queries
+CREATE INDEX IF NOT EXISTS idx_medications_timestamp ON medications(timestamp);
+CREATE INDEX IF NOT EXISTS idx_medications_medication ON medications(medication);
+
+-- Create workouts table
+CREATE SEQUENCE IF NOT EXISTS seq_workouts START 1;
+CREATE TABLE IF NOT EXISTS workouts (
+    id INTEGER PRIMARY KEY DEFAULT nextval('seq_workouts'),
+    start_time TIMESTAMP NOT NULL,
+    end_time TIMESTAMP,
+    type VARCHAR NOT NULL,
+    duration_seconds INTEGER,
+    total_energy_kcal DOUBLE,
+    active_energy_kcal DOUBLE,
+    max_heart_rate DOUBLE,
+    avg_heart_rate DOUBLE,
+    distance_km DOUBLE,
+    step_count INTEGER,
+    UNIQUE(start_time, type)
+);
+
+-- Create index for workouts queries
+CREATE INDEX IF NOT EXISTS idx_workouts_start_time ON workouts(start_time);
+CREATE INDEX IF NOT EXISTS idx_workouts_type ON workouts(type);
+
+COMMIT;
+"""
+
 def init_database():
     """Create database and tables if they don't exist."""
     
@@ -29,118 +116,21 @@ def init_database():
     conn = duckdb.connect(str(DB_PATH))
     
     try:
-        # Create readings table
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS readings (
-                timestamp TIMESTAMP NOT NULL,
-                metric VARCHAR NOT NULL,
-                value DOUBLE NOT NULL,
-                unit VARCHAR NOT NULL,
-                source VARCHAR NOT NULL,
-                PRIMARY KEY (timestamp, metric, source)
-            )
-        """)
-        
-        # Create indexes for common query patterns
-        conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_readings_timestamp 
-            ON readings(timestamp)
-        """)
-        
-        conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_readings_metric 
-            ON readings(metric)
-        """)
-        
-        # Create metrics metadata table
-        conn.execute("""
-            CREATE SEQUENCE IF NOT EXISTS seq_metrics START 1
-        """)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS metrics (
-                metric_id INTEGER PRIMARY KEY DEFAULT nextval('seq_metrics'),
-                name VARCHAR UNIQUE NOT NULL,
-                display_name VARCHAR,
-                category VARCHAR,
-                unit VARCHAR,
-                description VARCHAR
-            )
-        """)
-        
-        # Create imports log table
-        conn.execute("""
-            CREATE SEQUENCE IF NOT EXISTS seq_imports START 1
-        """)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS imports (
-                import_id INTEGER PRIMARY KEY DEFAULT nextval('seq_imports'),
-                filename VARCHAR UNIQUE NOT NULL,
-                imported_at TIMESTAMP NOT NULL,
-                rows_added INTEGER NOT NULL,
-                source VARCHAR NOT NULL
-            )
-        """)
-        
-        # Create medications table
-        conn.execute("""
-            CREATE SEQUENCE IF NOT EXISTS seq_medications START 1
-        """)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS medications (
-                id INTEGER PRIMARY KEY DEFAULT nextval('seq_medications'),
-                timestamp TIMESTAMP NOT NULL,
-                scheduled_at TIMESTAMP,
-                medication VARCHAR NOT NULL,
-                dosage DOUBLE,
-                scheduled_dosage DOUBLE,
-                unit VARCHAR,
-                status VARCHAR,
-                UNIQUE(timestamp, medication)
-            )
-        """)
-        
-        # Create index for medications queries
-        conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_medications_timestamp 
-            ON medications(timestamp)
-        """)
-        
-        conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_medications_medication 
-            ON medications(medication)
-        """)
-        
-        # Create workouts table
-        conn.execute("""
-            CREATE SEQUENCE IF NOT EXISTS seq_workouts START 1
-        """)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS workouts (
-                id INTEGER PRIMARY KEY DEFAULT nextval('seq_workouts'),
-                start_time TIMESTAMP NOT NULL,
-                end_time TIMESTAMP,
-                type VARCHAR NOT NULL,
-                duration_seconds INTEGER,
-                total_energy_kcal DOUBLE,
-                active_energy_kcal DOUBLE,
-                max_heart_rate DOUBLE,
-                avg_heart_rate DOUBLE,
-                distance_km DOUBLE,
-                step_count INTEGER,
-                UNIQUE(start_time, type)
-            )
-        """)
-        
-        # Create index for workouts queries
-        conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_workouts_start_time 
-            ON workouts(start_time)
-        """)
-        
-        conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_workouts_type 
-            ON workouts(type)
-        """)
+        # One multi-statement execute: a single parse and catalog transaction
+        conn.execute(SCHEMA_SQL)
+        
+        # Index for matching renamed copies by content. An imports table from
+        # before file_hash keeps its old columns (CREATE TABLE IF NOT EXISTS),
+        # so only index it once migrate_add_file_hash.py has added the column
+        has_file_hash = conn.execute("""
+            SELECT COUNT(*) FROM information_schema.columns
+            WHERE table_name = 'imports' AND column_name = 'file_hash'
+        """).fetchone()[0]
+        if has_file_hash:
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_imports_file_hash ON imports(file_hash)")
+        
+        # (Re)build per-day rollup of readings (also refreshed by daily_import.py)
+        refresh_daily_metric_summary(conn)
         
         # Verify tables exist
         tables = conn.execute("""
@@ -150,7 +140,7 @@ def init_database():
         """).fetchall()
         
         table_names = [t[0] for t in tables]
-        expected = ['readings', 'metrics', 'imports', 'medications', 'workouts']
+        expected = ['readings', 'metrics', 'imports', 'medications', 'workouts', 'daily_metric_summary']
         
         print(f"✅ Database initialized: {DB_PATH}")
         print(f"✅ Created tables: {', '.join(sorted(table_names))}")
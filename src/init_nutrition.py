@@ -1,16 +1,16 @@
 #!/usr/bin/env python3
 """Initialize the nutrition_log table in the health database."""
 
-import duckdb
 from pathlib import Path
 from config import get_db_path
+from db import get_conn
 
 DB_PATH = get_db_path()
 
 def init_nutrition_table():
     """Create the nutrition_log table if it doesn't exist."""
     
-    conn = duckdb.connect(str(DB_PATH))
+    conn = get_conn()
     
     conn.execute("""
         CREATE TABLE IF NOT EXISTS nutrition_log (
@@ -74,7 +74,6 @@ def init_nutrition_table():
         ON nutrition_log(meal_type)
     """)
     
-    conn.close()
     print("✅ nutrition_log table initialized successfully")
     print(f"   Database: {DB_PATH}")
 
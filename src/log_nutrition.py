@@ -4,6 +4,7 @@ Log a nutrition entry to the database.
 
 Usage:
     python log_nutrition.py --json '{...}'
+    python log_nutrition.py --json '[{...}, {...}]'   # several entries at once
     
 JSON format:
 {
@@ -41,12 +42,9 @@ JSON format:
 
 import argparse
 import json
-import duckdb
 from pathlib import Path
 from datetime import datetime
-from config import get_db_path
-
-DB_PATH = get_db_path()
+from db import get_conn
 
 NUTRITION_FIELDS = [
     "meal_time", "meal_type", "meal_name", "meal_description", "food_items",
@@ -59,44 +57,55 @@ NUTRITION_FIELDS = [
     "source", "notes"
 ]
 
-def log_nutrition(data: dict) -> int:
-    """Log a nutrition entry and return the entry_id."""
-    
-    conn = duckdb.connect(str(DB_PATH))
-    
-    # Get next entry_id
-    result = conn.execute("SELECT nextval('seq_nutrition_entry')").fetchone()
-    entry_id = result[0]
-    
-    # Convert food_items list to JSON string if needed
-    if "food_items" in data and isinstance(data["food_items"], list):
-        data["food_items"] = json.dumps(data["food_items"])
-    
-    # Build insert statement
-    fields = ["entry_id"] + [f for f in NUTRITION_FIELDS if f in data]
-    placeholders = ["?"] * len(fields)
-    values = [entry_id] + [data.get(f) for f in fields[1:]]
-    
-    sql = f"""
-        INSERT INTO nutrition_log ({', '.join(fields)})
-        VALUES ({', '.join(placeholders)})
-    """
+# One INSERT for any number of entries: each field is bound as a list
+# (missing keys are NULL) and unnested, so a batch is a single statement.
+# entry_id comes from the sequence in-SQL and source keeps its 'chat'
+# default when not given.
+INSERT_SQL = f"""
+    INSERT INTO nutrition_log (entry_id, {', '.join(NUTRITION_FIELDS)})
+    SELECT
+        nextval('seq_nutrition_entry'),
+        {', '.join("COALESCE(source, 'chat')" if f == "source" else f for f in NUTRITION_FIELDS)}
+    FROM (
+        SELECT {', '.join(f"unnest(?) as {f}" for f in NUTRITION_FIELDS)}
+    )
+    RETURNING entry_id
+"""
+
+def nutrition_values(data: dict) -> list:
+    """Field values for an entry (food_items list stored as JSON)."""
+    values = [data.get(f) for f in NUTRITION_FIELDS]
+    food_items = NUTRITION_FIELDS.index("food_items")
+    if isinstance(values[food_items], list):
+        values[food_items] = json.dumps(values[food_items])
+    return values
+
+def log_nutrition_many(entries: list) -> list:
+    """Log several nutrition entries in one INSERT and return their entry_ids."""
+    if not entries:
+        return []
     
-    conn.execute(sql, values)
-    conn.close()
+    # Row-wise entries → one list of values per field
+    columns = [list(column) for column in zip(*(nutrition_values(data) for data in entries))]
     
-    return entry_id
+    return [row[0] for row in get_conn().execute(INSERT_SQL, columns).fetchall()]
+
+def log_nutrition(data: dict) -> int:
+    """Log a nutrition entry and return the entry_id."""
+    return log_nutrition_many([data])[0]
 
 def main():
     parser = argparse.ArgumentParser(description="Log nutrition entry")
-    parser.add_argument("--json", required=True, help="JSON data for the entry")
+    parser.add_argument("--json", required=True, help="JSON data for the entry (or a list of entries)")
     args = parser.parse_args()
     
     data = json.loads(args.json)
-    entry_id = log_nutrition(data)
-    print(f"✅ Logged nutrition entry #{entry_id}")
-    print(f"   Meal: {data.get('meal_name', 'unnamed')}")
-    print(f"   Calories: {data.get('calories', 'N/A')}")
+    entries = data if isinstance(data, list) else [data]
+    entry_ids = log_nutrition_many(entries)
+    for entry_id, entry in zip(entry_ids, entries):
+        print(f"✅ Logged nutrition entry #{entry_id}")
+        print(f"   Meal: {entry.get('meal_name', 'unnamed')}")
+        print(f"   Calories: {entry.get('calories', 'N/A')}")
 
 if __name__ == "__main__":
     main()
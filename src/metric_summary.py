@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Maintain the daily_metric_summary table.
+
+The dashboard only ever looks at per-day totals/averages, and readings only
+change when new exports are imported. daily_metric_summary stores one row per
+(date, metric) so dashboard queries scan a few thousand summary rows instead
+of every reading. Each row also carries the week/fortnight/month bucket
+its date falls in, so the detail charts group on plain columns rather than
+evaluating DATE_TRUNC per row. daily_import.py refreshes it after each
+import run.
+
+Usage:
+    python src/metric_summary.py
+"""
+
+import duckdb
+import sys
+from config import get_db_path
+
+DB_PATH = get_db_path()
+
+SUMMARY_SELECT = """
+    WITH daily AS (
+        SELECT
+            timestamp::DATE as date,
+            metric,
+            SUM(value) as sum_value,
+            AVG(value) as avg_value,
+            MIN(value) as min_value,
+            MAX(value) as max_value,
+            COUNT(*) as reading_count
+        FROM readings
+        GROUP BY timestamp::DATE, metric
+    )
+    SELECT
+        *,
+        DATE_TRUNC('week', date) as week,
+        DATE_TRUNC('week', date) - INTERVAL '7 days' * (EXTRACT(WEEK FROM date)::int % 2) as fortnight,
+        DATE_TRUNC('month', date) as month
+    FROM daily
+"""
+
+
+def refresh_daily_metric_summary(conn):
+    """
+    Rebuild daily_metric_summary from readings.
+
+    Args:
+        conn: Read-write DuckDB connection
+
+    Returns:
+        int: Number of (date, metric) rows in the summary
+    """
+    conn.execute(f"CREATE OR REPLACE TABLE daily_metric_summary AS {SUMMARY_SELECT}")
+    return conn.execute("SELECT COUNT(*) FROM daily_metric_summary").fetchone()[0]
+
+
+def ensure_daily_metric_summary(conn):
+    """
+    Build daily_metric_summary if the database doesn't have it yet.
+
+    Databases created before the rollup existed only get it from an import
+    run that imports something, so daily_import.py calls this on every run.
+
+    Args:
+        conn: Read-write DuckDB connection
+
+    Returns:
+        int: Number of rows built, or None if the table already existed
+    """
+    exists = conn.execute("""
+        SELECT COUNT(*) FROM duckdb_tables()
+        WHERE table_name = 'daily_metric_summary' AND NOT temporary
+    """).fetchone()[0]
+    if exists:
+        return None
+    return refresh_daily_metric_summary(conn)
+
+
+if __name__ == "__main__":
+    conn = duckdb.connect(str(DB_PATH))
+    try:
+        rows = refresh_daily_metric_summary(conn)
+        print(f"✅ daily_metric_summary refreshed ({rows} rows)")
+    except Exception as e:
+        print(f"❌ Error refreshing daily_metric_summary: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
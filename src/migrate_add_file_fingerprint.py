@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Migration: Add file_size and file_mtime_ns columns to imports table.
+
+daily_import.py compares these against os.stat() to skip hashing files
+whose size and modification time haven't changed since they were imported.
+"""
+
+import duckdb
+import sys
+from pathlib import Path
+from config import get_db_path
+
+DB_PATH = get_db_path()
+
+
+def add_fingerprint_columns(conn):
+    """
+    Add file_size and file_mtime_ns to imports if they don't exist.
+    
+    daily_import.py calls this at startup, so databases created before
+    the fingerprint columns are upgraded without running this script.
+    
+    Args:
+        conn: Read-write DuckDB connection
+    
+    Returns:
+        list: Names of the columns that were added
+    """
+    columns = conn.execute("PRAGMA table_info(imports)").fetchall()
+    column_names = [col[1] for col in columns]
+    
+    added = [c for c in ('file_size', 'file_mtime_ns') if c not in column_names]
+    for column in added:
+        conn.execute(f"ALTER TABLE imports ADD COLUMN IF NOT EXISTS {column} BIGINT")
+    return added
+
+
+def migrate():
+    """Add file_size and file_mtime_ns columns to imports table if they don't exist."""
+    conn = duckdb.connect(str(DB_PATH))
+    
+    try:
+        added = add_fingerprint_columns(conn)
+        
+        if added:
+            print(f"✅ Migration complete: {', '.join(added)} added")
+            print("📝 Note: Existing imports are fingerprinted on the next daily import")
+        else:
+            print("✅ Columns 'file_size' and 'file_mtime_ns' already exist in imports table")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    success = migrate()
+    sys.exit(0 if success else 1)
@@ -2,7 +2,8 @@
 """
 Migration: Add file_hash column to imports table.
 
-This enables hash-based change detection for re-importing updated files.
+This enables hash-based change detection for re-importing updated files,
+and indexes the hash so renamed copies of imported files can be found.
 """
 
 import duckdb
@@ -24,18 +25,23 @@ def migrate():
         
         if 'file_hash' in column_names:
             print("✅ Column 'file_hash' already exists in imports table")
-            return True
+        else:
+            # Add the column
+            print("🔨 Adding file_hash column to imports table...")
+            conn.execute("""
+                ALTER TABLE imports 
+                ADD COLUMN file_hash VARCHAR
+            """)
+            
+            print("✅ Migration complete: file_hash column added")
+            print("📝 Note: Existing imports will have NULL hash (backwards compatible)")
         
-        # Add the column
-        print("🔨 Adding file_hash column to imports table...")
+        # Index for matching files by content (renamed copies)
         conn.execute("""
-            ALTER TABLE imports 
-            ADD COLUMN file_hash VARCHAR
+            CREATE INDEX IF NOT EXISTS idx_imports_file_hash
+            ON imports(file_hash)
         """)
         
-        print("✅ Migration complete: file_hash column added")
-        print("📝 Note: Existing imports will have NULL hash (backwards compatible)")
-        
         return True
         
     except Exception as e:
@@ -10,84 +10,71 @@ Usage:
 """
 
 import argparse
-import duckdb
 import json
 from pathlib import Path
 from datetime import datetime, timedelta
-from config import get_db_path
+from db import get_conn
 
-DB_PATH = get_db_path()
+# Meals and totals for a set of nutrition_log rows, in one pass. The meals
+# come back as a list of structs already shaped like the output meal dicts,
+# so they are used as-is rather than rebuilt row by row in Python.
+SUMMARY_COLUMNS = """
+        list({
+            'entry_id': entry_id,
+            'time': CAST(meal_time AS VARCHAR),
+            'type': meal_type,
+            'name': meal_name,
+            'description': meal_description,
+            'calories': calories,
+            'protein_g': protein_g,
+            'carbs_g': carbs_g,
+            'fat_total_g': fat_total_g
+        } ORDER BY meal_time) as meals,
+        COUNT(*) as meal_count,
+        SUM(calories) as total_calories,
+        SUM(protein_g) as total_protein,
+        SUM(carbs_g) as total_carbs,
+        SUM(fat_total_g) as total_fat,
+        SUM(fat_saturated_g) as total_sat_fat,
+        SUM(fat_unsaturated_g) as total_unsat_fat,
+        SUM(fiber_g) as total_fiber,
+        SUM(sugar_g) as total_sugar,
+        SUM(sodium_mg) as total_sodium,
+        SUM(potassium_mg) as total_potassium,
+        SUM(calcium_mg) as total_calcium,
+        SUM(iron_mg) as total_iron,
+        SUM(magnesium_mg) as total_magnesium,
+        SUM(vitamin_d_mcg) as total_vit_d,
+        SUM(vitamin_b12_mcg) as total_vit_b12,
+        SUM(vitamin_c_mg) as total_vit_c,
+        SUM(cholesterol_mg) as total_cholesterol
+"""
 
-def get_daily_summary(date_str: str) -> dict:
-    """Get nutrition summary for a specific date."""
-    
-    conn = duckdb.connect(str(DB_PATH), read_only=True)
-    
-    # Get all meals for the day
-    meals = conn.execute("""
-        SELECT 
-            entry_id,
-            meal_time,
-            meal_type,
-            meal_name,
-            meal_description,
-            calories,
-            protein_g,
-            carbs_g,
-            fat_total_g,
-            fat_saturated_g,
-            fat_unsaturated_g,
-            fiber_g,
-            sugar_g,
-            sodium_mg
-        FROM nutrition_log
-        WHERE DATE(meal_time) = ?
-        ORDER BY meal_time
-    """, [date_str]).fetchall()
-    
-    # Get daily totals
-    totals = conn.execute("""
-        SELECT 
-            COUNT(*) as meal_count,
-            SUM(calories) as total_calories,
-            SUM(protein_g) as total_protein,
-            SUM(carbs_g) as total_carbs,
-            SUM(fat_total_g) as total_fat,
-            SUM(fat_saturated_g) as total_sat_fat,
-            SUM(fat_unsaturated_g) as total_unsat_fat,
-            SUM(fiber_g) as total_fiber,
-            SUM(sugar_g) as total_sugar,
-            SUM(sodium_mg) as total_sodium,
-            SUM(potassium_mg) as total_potassium,
-            SUM(calcium_mg) as total_calcium,
-            SUM(iron_mg) as total_iron,
-            SUM(magnesium_mg) as total_magnesium,
-            SUM(vitamin_d_mcg) as total_vit_d,
-            SUM(vitamin_b12_mcg) as total_vit_b12,
-            SUM(vitamin_c_mg) as total_vit_c,
-            SUM(cholesterol_mg) as total_cholesterol
-        FROM nutrition_log
-        WHERE DATE(meal_time) = ?
-    """, [date_str]).fetchone()
-    
-    conn.close()
+# The half-open meal_time ranges (rather than DATE(meal_time) = ?) let
+# DuckDB skip row groups by their min/max
+DAILY_SUMMARY_SQL = f"""
+    SELECT {SUMMARY_COLUMNS}
+    FROM nutrition_log
+    WHERE meal_time >= ? AND meal_time < ?
+"""
+
+# Every day of a range in one scan, grouped by date (days without meals
+# are absent)
+RANGE_SUMMARY_SQL = f"""
+    SELECT CAST(meal_time AS DATE) as date, {SUMMARY_COLUMNS}
+    FROM nutrition_log
+    WHERE meal_time >= ? AND meal_time < ?
+    GROUP BY CAST(meal_time AS DATE)
+    ORDER BY date
+"""
+
+def build_summary(date_str: str, row: tuple) -> dict:
+    """Turn a (meals, totals...) summary row into the summary dict."""
+    totals = row[1:]
     
     return {
         "date": date_str,
-        "meals": [
-            {
-                "entry_id": m[0],
-                "time": str(m[1]),
-                "type": m[2],
-                "name": m[3],
-                "description": m[4],
-                "calories": m[5],
-                "protein_g": m[6],
-                "carbs_g": m[7],
-                "fat_total_g": m[8]
-            }
-            for m in meals
-        ],
+        "meals": row[0] or [],
         "totals": {
             "meal_count": totals[0],
             "calories": totals[1],
@@ -110,6 +97,50 @@ def get_daily_summary(date_str: str) -> dict:
         }
     }
 
+def get_daily_summary(date_str: str) -> dict:
+    """Get nutrition summary for a specific date."""
+    
+    day = datetime.strptime(date_str, "%Y-%m-%d")
+    
+    conn = get_conn(read_only=True)
+    
+    row = conn.execute(DAILY_SUMMARY_SQL, [day, day + timedelta(days=1)]).fetchone()
+    
+    return build_summary(date_str, row)
+
+def get_range_summary(start: datetime, end: datetime) -> list:
+    """
+    Get nutrition summaries for each day with meals in [start, end).
+    
+    One grouped query covers the whole range instead of one
+    get_daily_summary call (and scan) per day.
+    
+    Returns:
+        list: Daily summary dicts, oldest first
+    """
+    conn = get_conn(read_only=True)
+    
+    rows = conn.execute(RANGE_SUMMARY_SQL, [start, end]).fetchall()
+    
+    return [build_summary(row[0].isoformat(), row[1:]) for row in rows]
+
+# The totals part of format_summary, built once; filled from the
+# summary's "totals" dict with a single str.format call per day
+TOTALS_TEMPLATE = (
+    "\n\n"
+    "**Daily Totals:**\n"
+    "  Calories: {calories:.0f}\n"
+    "  Protein: {protein_g:.1f}g\n"
+    "  Carbs: {carbs_g:.1f}g (fiber: {fiber_g:.1f}g, sugar: {sugar_g:.1f}g)\n"
+    "  Fat: {fat_total_g:.1f}g (sat: {fat_saturated_g:.1f}g, unsat: {fat_unsaturated_g:.1f}g)\n"
+    "\n"
+    "**Key Micronutrients:**\n"
+    "  Sodium: {sodium_mg:.0f}mg | Potassium: {potassium_mg:.0f}mg\n"
+    "  Calcium: {calcium_mg:.0f}mg | Iron: {iron_mg:.1f}mg | Magnesium: {magnesium_mg:.0f}mg\n"
+    "  Vitamin D: {vitamin_d_mcg:.1f}mcg | B12: {vitamin_b12_mcg:.1f}mcg | C: {vitamin_c_mg:.0f}mg\n"
+    "  Cholesterol: {cholesterol_mg:.0f}mg"
+)
+
 def format_summary(summary: dict) -> str:
     """Format summary for display."""
     
@@ -127,31 +158,34 @@ def format_summary(summary: dict) -> str:
         cals = meal["calories"] or 0
         lines.append(f"  • {meal_type}: {name} ({cals:.0f} cal)")
     
-    lines.append("")
-    
-    # Daily totals
-    t = summary["totals"]
-    lines.append("**Daily Totals:**")
-    lines.append(f"  Calories: {t['calories'] or 0:.0f}")
-    lines.append(f"  Protein: {t['protein_g'] or 0:.1f}g")
-    lines.append(f"  Carbs: {t['carbs_g'] or 0:.1f}g (fiber: {t['fiber_g'] or 0:.1f}g, sugar: {t['sugar_g'] or 0:.1f}g)")
-    lines.append(f"  Fat: {t['fat_total_g'] or 0:.1f}g (sat: {t['fat_saturated_g'] or 0:.1f}g, unsat: {t['fat_unsaturated_g'] or 0:.1f}g)")
-    lines.append("")
-    lines.append("**Key Micronutrients:**")
-    lines.append(f"  Sodium: {t['sodium_mg'] or 0:.0f}mg | Potassium: {t['potassium_mg'] or 0:.0f}mg")
-    lines.append(f"  Calcium: {t['calcium_mg'] or 0:.0f}mg | Iron: {t['iron_mg'] or 0:.1f}mg | Magnesium: {t['magnesium_mg'] or 0:.0f}mg")
-    lines.append(f"  Vitamin D: {t['vitamin_d_mcg'] or 0:.1f}mcg | B12: {t['vitamin_b12_mcg'] or 0:.1f}mcg | C: {t['vitamin_c_mg'] or 0:.0f}mg")
-    lines.append(f"  Cholesterol: {t['cholesterol_mg'] or 0:.0f}mg")
-    
-    return "\n".join(lines)
+    # Daily totals (missing values shown as 0)
+    totals = {key: value or 0 for key, value in summary["totals"].items()}
+    
+    return "\n".join(lines) + TOTALS_TEMPLATE.format(**totals)
 
 def main():
     parser = argparse.ArgumentParser(description="Nutrition summary")
     parser.add_argument("--today", action="store_true", help="Show today's summary")
     parser.add_argument("--date", help="Show summary for specific date (YYYY-MM-DD)")
+    parser.add_argument("--week", action="store_true", help="Show each day of the last 7 days")
+    parser.add_argument("--month", action="store_true", help="Show each day of the last 30 days")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
     args = parser.parse_args()
     
+    if args.week or args.month:
+        end = datetime.combine(datetime.now().date(), datetime.min.time()) + timedelta(days=1)
+        start = end - timedelta(days=7 if args.week else 30)
+        summaries = get_range_summary(start, end)
+        
+        if args.json:
+            print(json.dumps(summaries, indent=2, default=str))
+        elif summaries:
+            print("\n\n".join(format_summary(summary) for summary in summaries))
+        else:
+            last_day = (end - timedelta(days=1)).strftime("%Y-%m-%d")
+            print(f"📊 No meals logged from {start.strftime('%Y-%m-%d')} to {last_day}.")
+        return
+    
     if args.today:
         date_str = datetime.now().strftime("%Y-%m-%d")
     elif args.date:
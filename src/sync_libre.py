@@ -7,6 +7,7 @@ with deduplication.
 
 Requirements:
     pip install pylibrelinkup
+    pip install keyring       # optional: read the Keychain without `security`
 
 Configuration:
     Store credentials in macOS Keychain:
@@ -32,9 +33,12 @@ except ImportError:
     print("❌ pylibrelinkup not installed. Run: pip install pylibrelinkup")
     sys.exit(1)
 
-import duckdb
+try:
+    import keyring
+except ImportError:
+    keyring = None  # fall back to the `security` CLI
 
-from config import get_db_path
+from db import get_conn
 
 
 def get_credentials() -> tuple[str, str]:
@@ -42,8 +46,17 @@ def get_credentials() -> tuple[str, str]:
     email = os.environ.get("LIBRELINKUP_EMAIL")
     password = os.environ.get("LIBRELINKUP_PASSWORD")
     
+    if (not email or not password) and keyring is not None:
+        # Try macOS keychain through keyring (same entries, no subprocesses)
+        try:
+            password = password or keyring.get_password("librelinkup", "password")
+            email = email or keyring.get_password("librelinkup", "email")
+        except Exception:
+            pass
+    
     if not email or not password:
-        # Try macOS keychain
+        # Try macOS keychain through the security CLI (keyring missing, or
+        # it raised or found nothing)
         try:
             result = subprocess.run(
                 ["security", "find-generic-password", "-s", "librelinkup", "-a", "password", "-w"],
@@ -98,15 +111,12 @@ def sync_libre(use_graph: bool = False, dry_run: bool = False) -> dict:
     print(f"👤 Found {len(patients)} patient(s)")
     
     # Find the right patient (Haishan, not Croissant 🥐)
-    patient = None
+    patient = patients[0]  # Fallback to first
     for p in patients:
-        if "haishan" in p.first_name.lower() or "ye" in p.last_name.lower():
-            if "croissant" not in p.first_name.lower():
-                patient = p
-                break
-    
-    if not patient:
-        patient = patients[0]  # Fallback to first
+        first_name = p.first_name.lower()
+        if ("haishan" in first_name or "ye" in p.last_name.lower()) and "croissant" not in first_name:
+            patient = p
+            break
     
     print(f"📍 Using patient: {patient.first_name} {patient.last_name}")
     
@@ -129,32 +139,28 @@ def sync_libre(use_graph: bool = False, dry_run: bool = False) -> dict:
             print(f"  {r.timestamp}: {r.value} mg/dL")
         return {"status": "dry_run", "fetched": len(readings)}
     
-    # Connect to database
-    db_path = get_db_path()
-    conn = duckdb.connect(str(db_path))
+    # Writes go through a read-write connection
+    conn = get_conn(read_only=False)
     
-    # Insert readings with deduplication
-    inserted = 0
-    duplicates = 0
+    metric = "Glucose (Scan)" if not use_graph else "Glucose (Historic)"
     
-    for r in readings:
-        metric = "Glucose (Scan)" if not use_graph else "Glucose (Historic)"
-        
-        try:
-            conn.execute("""
-                INSERT INTO readings (timestamp, metric, value, unit, source)
-                VALUES (?, ?, ?, 'mg/dL', 'libre')
-                ON CONFLICT (timestamp, metric, source) DO NOTHING
-            """, [r.timestamp, metric, float(r.value)])
-            inserted += 1
-        except Exception as e:
-            print(f"⚠️  Error inserting reading: {e}")
-            duplicates += 1
-    
-    conn.commit()
-    conn.close()
-    
-    print(f"✅ Synced {inserted} readings ({duplicates} errors/duplicates)")
+    # Insert all readings in one statement (with deduplication): timestamps
+    # and values are bound as lists and unnested, so the batch is parsed,
+    # planned and committed once rather than per reading. The statement
+    # returns how many rows were actually inserted.
+    inserted = conn.execute("""
+        INSERT INTO readings (timestamp, metric, value, unit, source)
+        SELECT unnest(?), ?, unnest(?), 'mg/dL', 'libre'
+        ON CONFLICT (timestamp, metric, source) DO NOTHING
+    """, [
+        [r.timestamp for r in readings],
+        metric,
+        [float(r.value) for r in readings],
+    ]).fetchone()[0]
+    
+    duplicates = len(readings) - inserted
+    
+    print(f"✅ Synced {inserted} readings ({duplicates} duplicates)")
     
     return {
         "status": "success",
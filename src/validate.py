@@ -10,11 +10,11 @@ Usage:
     python src/validate.py --verbose
 """
 
-import duckdb
 import argparse
 from pathlib import Path
 from datetime import datetime, timedelta
 from config import get_db_path
+from db import get_conn
 
 # Paths
 DB_PATH = get_db_path()
@@ -49,33 +49,60 @@ class ValidationReport:
         
         if verbose and self.info:
             print("\n📋 Info:")
-            for msg in self.info:
-                print(f"   ℹ️  {msg}")
+            print("\n".join(f"   ℹ️  {msg}" for msg in self.info))
         
         if self.warnings:
             print(f"\n⚠️  Warnings ({len(self.warnings)}):")
-            for msg in self.warnings:
-                print(f"   ⚠️  {msg}")
+            print("\n".join(f"   ⚠️  {msg}" for msg in self.warnings))
         else:
             print("\n✅ No data quality issues found")
         
         print("="*60)
 
-def validate_heart_rate_range(conn, report):
-    """Check for heart rate readings outside normal range."""
+def fetch_readings_stats(conn):
+    """
+    Compute what the whole-table checks need in a single scan of readings.
+    
+    The heart rate range, future timestamp and date coverage checks each
+    used to run their own query over all of readings; here they are
+    FILTERed aggregates of one pass.
     
-    # Check for heart rate outliers
-    # Exclude HRV (measured in ms) and Recovery (percentage)
-    outliers = conn.execute(f"""
-        SELECT timestamp, value, metric
+    Returns:
+        dict: hr_outliers (newest 10 as (timestamp, value, metric)),
+              future_count, earliest_future, earliest, latest, days_with_data
+    """
+    now = datetime.now()
+    row = conn.execute("""
+        SELECT
+            -- Heart rate outliers, newest first
+            -- Exclude HRV (measured in ms) and Recovery (percentage)
+            max_by((timestamp, value, metric), timestamp, 10) FILTER (
+                WHERE metric LIKE '%Heart Rate%'
+                  AND metric NOT LIKE '%Variability%'
+                  AND metric NOT LIKE '%Recovery%'
+                  AND (value < ? OR value > ?)
+            ) as hr_outliers,
+            COUNT(*) FILTER (WHERE timestamp > ?) as future_count,
+            MIN(timestamp) FILTER (WHERE timestamp > ?) as earliest_future,
+            MIN(timestamp::DATE) as earliest,
+            MAX(timestamp::DATE) as latest,
+            COUNT(DISTINCT timestamp::DATE) as days_with_data
         FROM readings
-        WHERE metric LIKE '%Heart Rate%'
-          AND metric NOT LIKE '%Variability%'
-          AND metric NOT LIKE '%Recovery%'
-          AND (value < {HEART_RATE_MIN} OR value > {HEART_RATE_MAX})
-        ORDER BY timestamp DESC
-        LIMIT 10
-    """).fetchall()
+    """, [HEART_RATE_MIN, HEART_RATE_MAX, now, now]).fetchone()
+    
+    return {
+        "hr_outliers": row[0] or [],
+        "future_count": row[1],
+        "earliest_future": row[2],
+        "earliest": row[3],
+        "latest": row[4],
+        "days_with_data": row[5],
+    }
+
+def validate_heart_rate_range(stats, report):
+    """Check for heart rate readings outside normal range."""
+    
+    outliers = stats["hr_outliers"]
     
     if outliers:
         report.add_warning(
@@ -88,17 +115,10 @@ def validate_heart_rate_range(conn, report):
     else:
         report.add_info("Heart rate values within normal range")
 
-def validate_no_future_timestamps(conn, report):
+def validate_no_future_timestamps(stats, report):
     """Check for timestamps in the future."""
     
-    now = datetime.now()
-    future_readings = conn.execute("""
-        SELECT COUNT(*), MIN(timestamp) as earliest_future
-        FROM readings
-        WHERE timestamp > ?
-    """, [now]).fetchone()
-    
-    count, earliest = future_readings
+    count, earliest = stats["future_count"], stats["earliest_future"]
     
     if count > 0:
         report.add_warning(
@@ -107,19 +127,10 @@ def validate_no_future_timestamps(conn, report):
     else:
         report.add_info("No future timestamps found")
 
-def validate_date_coverage(conn, report):
+def validate_date_coverage(conn, stats, report):
     """Check for missing days in the date range."""
     
-    # Get date range
-    date_range = conn.execute("""
-        SELECT 
-            MIN(DATE(timestamp)) as earliest,
-            MAX(DATE(timestamp)) as latest,
-            COUNT(DISTINCT DATE(timestamp)) as days_with_data
-        FROM readings
-    """).fetchone()
-    
-    earliest, latest, days_with_data = date_range
+    earliest, latest, days_with_data = stats["earliest"], stats["latest"], stats["days_with_data"]
     
     if not earliest or not latest:
         report.add_warning("No data found in database")
@@ -145,22 +156,19 @@ def validate_date_coverage(conn, report):
         report.add_warning(f"Missing data for {missing_days} day(s) in date range")
         
         # Find specific missing dates (limit to first 5)
+        # Every day from earliest to latest, anti-joined against the days
+        # that have readings (built once, hashed)
         missing_dates = conn.execute("""
-            WITH date_series AS (
-                SELECT DATE(MIN(timestamp)) + INTERVAL (n) DAY as date
-                FROM readings, generate_series(0, 
-                    DATE_DIFF('day', 
-                        DATE(MIN(timestamp)), 
-                        DATE(MAX(timestamp))
-                    )
-                ) as t(n)
+            WITH days AS (
+                SELECT DISTINCT timestamp::DATE as date
+                FROM readings
             )
-            SELECT date
-            FROM date_series
-            WHERE date NOT IN (SELECT DISTINCT DATE(timestamp) FROM readings)
+            SELECT CAST(series.date AS DATE) as date
+            FROM generate_series(CAST(? AS DATE), CAST(? AS DATE), INTERVAL 1 DAY) as series(date)
+            ANTI JOIN days ON CAST(series.date AS DATE) = days.date
             ORDER BY date
             LIMIT 5
-        """).fetchall()
+        """, [earliest_date, latest_date]).fetchall()
         
         if missing_dates:
             for (date,) in missing_dates:
@@ -172,17 +180,24 @@ def detect_resting_hr_anomalies(conn, report):
     """Detect unusual resting heart rate values (recent data only)."""
     
     # Calculate lookback date
-    lookback_date = (datetime.now() - timedelta(days=ANOMALY_LOOKBACK_DAYS)).strftime('%Y-%m-%d')
+    lookback_date = (datetime.now() - timedelta(days=ANOMALY_LOOKBACK_DAYS)).date()
     
-    # Get recent resting HR readings with 7-day rolling average
-    anomalies = conn.execute(f"""
+    # Only read the lookback window plus the week before it, which seeds
+    # the rolling average for the window's first days. Filtering the raw
+    # timestamp before grouping lets DuckDB skip older row groups.
+    warmup_start = datetime.combine(lookback_date - timedelta(days=7), datetime.min.time())
+    
+    # Get recent resting HR readings with 7-day rolling average. Dates and
+    # the threshold are bound, so the SQL text is the same on every run.
+    anomalies = conn.execute("""
         WITH resting_hr AS (
             SELECT 
-                DATE(timestamp) as date,
+                timestamp::DATE as date,
                 AVG(value) as daily_avg
             FROM readings
             WHERE metric = 'Resting Heart Rate'
-            GROUP BY DATE(timestamp)
+              AND timestamp >= ?
+            GROUP BY timestamp::DATE
         ),
         with_rolling_avg AS (
             SELECT
@@ -201,11 +216,11 @@ def detect_resting_hr_anomalies(conn, report):
             ABS(daily_avg - rolling_avg_7d) as deviation
         FROM with_rolling_avg
         WHERE rolling_avg_7d IS NOT NULL
-          AND ABS(daily_avg - rolling_avg_7d) > {RESTING_HR_DEVIATION_THRESHOLD}
-          AND date >= '{lookback_date}'
+          AND ABS(daily_avg - rolling_avg_7d) > ?
+          AND date >= ?
         ORDER BY date DESC
         LIMIT 5
-    """).fetchall()
+    """, [warmup_start, RESTING_HR_DEVIATION_THRESHOLD, lookback_date]).fetchall()
     
     if anomalies:
         report.add_warning(
@@ -233,18 +248,18 @@ def run_validation(verbose=False):
         print(f"❌ Database not found: {DB_PATH}")
         return None
     
-    conn = duckdb.connect(str(DB_PATH))
+    # Read-only: none of the checks write, and it doesn't lock out other
+    # readers. When daily_import.py calls this, db.get_conn() hands back the
+    # process's already-open read-write connection instead.
+    conn = get_conn(read_only=True)
     report = ValidationReport()
     
-    try:
-        # Run all validation checks
-        validate_heart_rate_range(conn, report)
-        validate_no_future_timestamps(conn, report)
-        validate_date_coverage(conn, report)
-        detect_resting_hr_anomalies(conn, report)
-        
-    finally:
-        conn.close()
+    # Run all validation checks
+    stats = fetch_readings_stats(conn)
+    validate_heart_rate_range(stats, report)
+    validate_no_future_timestamps(stats, report)
+    validate_date_coverage(conn, stats, report)
+    detect_resting_hr_anomalies(conn, report)
     
     return report
 